@@ -0,0 +1,8 @@
+from django.apps import AppConfig
+
+
+class RestApiConfig(AppConfig):
+    name = "rest_api"
+
+    def ready(self):
+        from . import checks, db, metrics  # noqa: F401
@@ -0,0 +1,32 @@
+"""
+System checks for settings that only matter once there is more than one
+worker process; they run with `manage.py check --deploy`.
+"""
+
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+
+PROCESS_LOCAL_CACHES = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    errors = []
+    # Replica pins and referral code lookups use the default cache
+    for alias in dict.fromkeys(["default", settings.RESPONSE_CACHE["ALIAS"]]):
+        if settings.CACHES[alias]["BACKEND"] in PROCESS_LOCAL_CACHES:
+            errors.append(
+                Error(
+                    f"The '{alias}' cache is local to each process.",
+                    hint=(
+                        "Workers would keep serving entries other workers "
+                        "invalidated. Set CACHE_BACKEND to 'redis', "
+                        "'memcached' or 'database'."
+                    ),
+                    id="rest_api.E001",
+                )
+            )
+    return errors
@@ -0,0 +1,23 @@
+"""
+Per-connection database setup.
+
+SQLite connections get SQLITE_PRAGMAS applied as soon as they're opened:
+WAL lets readers run alongside the writer, synchronous=NORMAL only syncs at
+checkpoints, busy_timeout makes writers wait for the lock instead of failing
+and mmap_size serves reads from the page cache.
+"""
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+
+def apply_sqlite_pragmas(cursor, pragmas):
+    for name, value in pragmas.items():
+        cursor.execute(f"PRAGMA {name} = {value}")
+
+
+@receiver(connection_created)
+def configure_sqlite(sender, connection, **kwargs):
+    if connection.vendor == "sqlite":
+        with connection.cursor() as cursor:
+            apply_sqlite_pragmas(cursor, settings.SQLITE_PRAGMAS)
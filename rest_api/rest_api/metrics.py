@@ -0,0 +1,291 @@
+"""
+Per-request performance metrics.
+
+MetricsMiddleware times every request and, through the hooks below, splits
+the time into SQL (every query passes through `record_query`, installed on
+each database connection), authentication, serialization (`timed`, around
+every `serializer.data` and the list fast path) and rendering. Requests are aggregated per route into
+latency histograms kept in this process, and `render_prometheus()` writes
+them out in the Prometheus text format, with p50/p95/p99 estimated from the
+histogram buckets.
+
+Each worker process keeps its own numbers; scrape every worker, or sum
+them, the way Prometheus does with any multi-process exporter.
+"""
+
+import bisect
+import hmac
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.http import HttpResponse
+from rest_framework.serializers import BaseSerializer
+
+# Upper bounds in seconds, about 25% apart from 1ms to 30s, so quantiles
+# interpolated inside a bucket are off by a few percent at most
+BUCKETS = tuple(round(0.001 * 1.25**i, 6) for i in range(47))
+QUANTILES = (0.5, 0.95, 0.99)
+
+_current = ContextVar("request_metrics", default=None)
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.queries = 0
+        self.sql_time = 0.0
+        self.phases = {}
+        # Phases being timed, so nested blocks aren't counted twice
+        self.open = set()
+
+    def add(self, phase, seconds):
+        self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+
+def begin_request():
+    return _current.set(RequestMetrics())
+
+
+def end_request(token):
+    metrics = _current.get()
+    _current.reset(token)
+    return metrics
+
+
+def current():
+    return _current.get()
+
+
+@receiver(connection_created)
+def install_query_recorder(sender, connection, **kwargs):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+def record_query(execute, sql, params, many, context):
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.queries += 1
+        metrics.sql_time += time.perf_counter() - start
+
+
+@contextmanager
+def timed(phase):
+    """Adds the time spent in the block, minus its SQL time, to `phase`."""
+    metrics = _current.get()
+    if metrics is None or phase in metrics.open:
+        yield
+        return
+    metrics.open.add(phase)
+    start, sql_time = time.perf_counter(), metrics.sql_time
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        metrics.add(phase, elapsed - (metrics.sql_time - sql_time))
+        metrics.open.discard(phase)
+
+
+def _timed_data(data):
+    def timed_data(self):
+        with timed("serialize"):
+            return data(self)
+
+    timed_data.__wrapped__ = data
+    return property(timed_data)
+
+
+# Serializer.data and ListSerializer.data both build on BaseSerializer.data,
+# so every view's serialization is timed, whatever serializer it uses
+if not hasattr(BaseSerializer.data.fget, "__wrapped__"):
+    BaseSerializer.data = _timed_data(BaseSerializer.data.fget)
+
+
+class Histogram:
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        # One count per bucket plus the +Inf overflow
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q):
+        """Estimates the q-quantile by interpolating inside its bucket."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            if seen + count >= rank and count:
+                if i == len(self.buckets):
+                    # Past the last bound, the best guess is that bound
+                    return self.buckets[-1]
+                lower = self.buckets[i - 1] if i else 0.0
+                return lower + (self.buckets[i] - lower) * (rank - seen) / count
+            seen += count
+        return self.buckets[-1]
+
+
+class RouteStats:
+    def __init__(self):
+        self.latency = Histogram()
+        self.responses = {}
+        self.queries = 0
+        self.totals = {}
+
+    def record(self, status, wall, metrics, size):
+        self.latency.observe(wall)
+        self.responses[status] = self.responses.get(status, 0) + 1
+        self.queries += metrics.queries
+        totals = self.totals
+        totals["sql"] = totals.get("sql", 0.0) + metrics.sql_time
+        for phase, seconds in metrics.phases.items():
+            totals[phase] = totals.get(phase, 0.0) + seconds
+        if size is not None:
+            totals["bytes"] = totals.get("bytes", 0) + size
+
+
+class Registry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.routes = {}
+
+    def record(self, route, method, status, wall, metrics, size):
+        with self.lock:
+            stats = self.routes.get((route, method))
+            if stats is None:
+                stats = self.routes[(route, method)] = RouteStats()
+            stats.record(status, wall, metrics, size)
+
+    def reset(self):
+        with self.lock:
+            self.routes = {}
+
+
+registry = Registry()
+
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels):
+    return ",".join(f'{name}="{_escape(str(value))}"' for name, value in labels.items())
+
+
+def render_prometheus(registry=registry):
+    """Returns every route's metrics in the Prometheus text format (0.0.4)."""
+    with registry.lock:
+        routes = sorted(registry.routes.items())
+        lines = []
+
+        def family(name, kind, help):
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        family(
+            "http_request_duration_seconds",
+            "histogram",
+            "Time from the first to the last middleware, per route.",
+        )
+        for (route, method), stats in routes:
+            labels = _labels(route=route, method=method)
+            cumulative = 0
+            for bound, count in zip(BUCKETS + ("+Inf",), stats.latency.counts):
+                cumulative += count
+                le = bound if bound == "+Inf" else repr(bound)
+                lines.append(
+                    f'http_request_duration_seconds_bucket{{{labels},le="{le}"}}'
+                    f" {cumulative}"
+                )
+            lines.append(
+                f"http_request_duration_seconds_sum{{{labels}}} {stats.latency.sum!r}"
+            )
+            lines.append(
+                f"http_request_duration_seconds_count{{{labels}}} {stats.latency.count}"
+            )
+
+        family(
+            "http_request_latency_seconds",
+            "summary",
+            "p50/p95/p99 latency estimated from http_request_duration_seconds.",
+        )
+        for (route, method), stats in routes:
+            labels = _labels(route=route, method=method)
+            for q in QUANTILES:
+                lines.append(
+                    f'http_request_latency_seconds{{{labels},quantile="{q}"}}'
+                    f" {stats.latency.quantile(q)!r}"
+                )
+            lines.append(
+                f"http_request_latency_seconds_sum{{{labels}}} {stats.latency.sum!r}"
+            )
+            lines.append(
+                f"http_request_latency_seconds_count{{{labels}}} {stats.latency.count}"
+            )
+
+        family("http_responses_total", "counter", "Responses by status code.")
+        for (route, method), stats in routes:
+            for status, count in sorted(stats.responses.items()):
+                labels = _labels(route=route, method=method, status=status)
+                lines.append(f"http_responses_total{{{labels}}} {count}")
+
+        family("http_request_db_queries_total", "counter", "SQL queries run.")
+        for (route, method), stats in routes:
+            labels = _labels(route=route, method=method)
+            lines.append(f"http_request_db_queries_total{{{labels}}} {stats.queries}")
+
+        family(
+            "http_request_phase_seconds_total",
+            "counter",
+            "Time spent in SQL, authentication, serialization and rendering.",
+        )
+        for (route, method), stats in routes:
+            for phase, seconds in sorted(stats.totals.items()):
+                if phase != "bytes":
+                    labels = _labels(route=route, method=method, phase=phase)
+                    lines.append(
+                        f"http_request_phase_seconds_total{{{labels}}} {seconds!r}"
+                    )
+
+        family("http_response_size_bytes_total", "counter", "Response body bytes.")
+        for (route, method), stats in routes:
+            labels = _labels(route=route, method=method)
+            size = stats.totals.get("bytes", 0)
+            lines.append(f"http_response_size_bytes_total{{{labels}}} {size}")
+
+    return "\n".join(lines) + "\n"
+
+
+def metrics_view(request):
+    """
+    Serves render_prometheus() behind METRICS["TOKEN"]. Without a token the
+    metrics are only served with DEBUG on.
+    """
+    token = settings.METRICS["TOKEN"]
+    if token:
+        given = request.headers.get("Authorization", "").removeprefix("Bearer ")
+        if not hmac.compare_digest(given.encode(), token.encode()):
+            return HttpResponse(status=401, headers={"WWW-Authenticate": "Bearer"})
+    elif not settings.DEBUG:
+        return HttpResponse(
+            "Set METRICS_TOKEN to serve metrics.", status=403, content_type="text/plain"
+        )
+    return HttpResponse(
+        render_prometheus(), content_type="text/plain; version=0.0.4; charset=utf-8"
+    )
@@ -0,0 +1,102 @@
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from . import metrics, routers
+
+METHODS = {"GET", "HEAD", "OPTIONS", "POST", "PUT", "PATCH", "DELETE"}
+
+
+class MetricsMiddleware:
+    """
+    Records each request's time, SQL, serialization, rendering and response
+    size per route, see rest_api/metrics.py. Goes first in MIDDLEWARE so the
+    time covers every other middleware.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.METRICS["ENABLED"]:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = metrics.begin_request()
+        try:
+            response = self.get_response(request)
+        finally:
+            request_metrics = metrics.end_request(token)
+        self.record(request, response, request_metrics)
+        return response
+
+    async def __acall__(self, request):
+        token = metrics.begin_request()
+        try:
+            response = await self.get_response(request)
+        finally:
+            request_metrics = metrics.end_request(token)
+        self.record(request, response, request_metrics)
+        return response
+
+    def process_template_response(self, request, response):
+        # Called last of the template response hooks, right before rendering
+        request_metrics = metrics.current()
+        if request_metrics is not None:
+            start = time.perf_counter()
+            response.add_post_render_callback(
+                lambda response: request_metrics.add(
+                    "render", time.perf_counter() - start
+                )
+            )
+        return response
+
+    def record(self, request, response, request_metrics):
+        wall = time.perf_counter() - request_metrics.start
+        # Collected by users.authentication.ProfileAuthentication
+        authentication_time = getattr(request, "authentication_time", 0.0)
+        if authentication_time:
+            request_metrics.add("auth", authentication_time)
+        match = request.resolver_match
+        route = match.view_name if match else "<unmatched>"
+        method = request.method if request.method in METHODS else "OTHER"
+        # Streamed bodies aren't known yet, nor is the time spent sending them
+        size = None if response.streaming else len(response.content)
+        metrics.registry.record(
+            route, method, response.status_code, wall, request_metrics, size
+        )
+
+
+class ReplicaRoutingMiddleware:
+    """Sets up read-replica routing for the request, see rest_api/routers.py."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = routers.begin_request(request)
+        try:
+            return self.get_response(request)
+        finally:
+            routers.end_request(token)
+
+    async def __acall__(self, request):
+        token = await routers.abegin_request(request)
+        try:
+            return await self.get_response(request)
+        finally:
+            await routers.aend_request(token)
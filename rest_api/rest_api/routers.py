@@ -0,0 +1,115 @@
+"""
+Read-replica routing.
+
+ReplicaRoutingMiddleware marks each request: reads of GET/HEAD/OPTIONS
+requests go to one of DATABASE_REPLICAS, everything else uses the primary.
+Once a request writes, the client (identified by its Authorization header or
+session cookie) is pinned to the primary for REPLICA_PIN_SECONDS so it reads
+its own writes while the replicas catch up. Pins are kept in the default
+cache, which must be shared between workers in production (see CACHES), and
+are neither read nor written when there are no replicas. Async requests use
+the async cache API, so the event loop never waits on the cache.
+With the database cache, the cache table always lives on the primary and
+cache writes don't pin the client.
+"""
+
+import hashlib
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+# App label of DatabaseCache's table
+CACHE_APP_LABEL = "django_cache"
+
+_routing = ContextVar("replica_routing", default=None)
+
+
+class RequestRouting:
+    def __init__(self, replica, pin_key):
+        self.replica = replica
+        self.pin_key = pin_key
+        self.wrote = False
+
+
+def get_pin_key(request):
+    if not settings.DATABASE_REPLICAS:
+        return None
+    client = request.META.get("HTTP_AUTHORIZATION") or request.COOKIES.get(
+        settings.SESSION_COOKIE_NAME
+    )
+    if not client:
+        return None
+    return "replica_pin:" + hashlib.sha256(client.encode()).hexdigest()
+
+
+def _begin(request, pinned):
+    replica = None
+    if settings.DATABASE_REPLICAS and request.method in SAFE_METHODS and not pinned:
+        replica = random.choice(settings.DATABASE_REPLICAS)
+    return _routing.set(RequestRouting(replica, get_pin_key(request)))
+
+
+def _end(token):
+    """Returns the pin key to set, if the request wrote."""
+    routing = _routing.get()
+    _routing.reset(token)
+    return routing.pin_key if routing.wrote else None
+
+
+def begin_request(request):
+    pin_key = get_pin_key(request)
+    pinned = bool(pin_key and request.method in SAFE_METHODS and cache.get(pin_key))
+    return _begin(request, pinned)
+
+
+def end_request(token):
+    pin_key = _end(token)
+    if pin_key:
+        cache.set(pin_key, True, settings.REPLICA_PIN_SECONDS)
+
+
+async def abegin_request(request):
+    pin_key = get_pin_key(request)
+    pinned = bool(
+        pin_key and request.method in SAFE_METHODS and await cache.aget(pin_key)
+    )
+    return _begin(request, pinned)
+
+
+async def aend_request(token):
+    pin_key = _end(token)
+    if pin_key:
+        await cache.aset(pin_key, True, settings.REPLICA_PIN_SECONDS)
+
+
+def use_primary():
+    """Sends the rest of the current request's reads to the primary."""
+    routing = _routing.get()
+    if routing is not None:
+        routing.replica = None
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        routing = _routing.get()
+        if routing is None:
+            return None
+        if model._meta.app_label == CACHE_APP_LABEL:
+            # A replica could still hold entries the primary invalidated
+            return "default"
+        return routing.replica
+
+    def db_for_write(self, model, **hints):
+        routing = _routing.get()
+        if routing is not None and model._meta.app_label != CACHE_APP_LABEL:
+            # Later reads of this request must see the write too
+            routing.wrote = True
+            routing.replica = None
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary
+        return True
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.0/ref/settings/
 """
 
+import os
 from pathlib import Path
 from datetime import timedelta
 
@@ -39,17 +40,21 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     'django.contrib.staticfiles',
     'rest_framework',
+    'django_filters',
     'rest_api',
     'users',
     'drf_yasg',
 ]
 
 MIDDLEWARE = [
+    'rest_api.middleware.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'rest_api.middleware.ReplicaRoutingMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'users.middleware.AuthenticationTimingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -78,14 +83,137 @@ WSGI_APPLICATION = 'rest_api.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.0/ref/settings/#databases
 
-DATABASES = {
+# Picked with DB_ENGINE ('sqlite' or 'postgresql'). Connections are kept open
+# for DB_CONN_MAX_AGE seconds and health-checked before reuse. Set
+# DB_DISABLE_SERVER_SIDE_CURSORS=1 when PostgreSQL sits behind pgbouncer in
+# transaction pooling mode.
+
+DB_ENGINE = os.environ.get('DB_ENGINE', 'sqlite')
+
+if DB_ENGINE == 'postgresql':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('DB_NAME', 'rest_api'),
+            'USER': os.environ.get('DB_USER', ''),
+            'PASSWORD': os.environ.get('DB_PASSWORD', ''),
+            'HOST': os.environ.get('DB_HOST', ''),
+            'PORT': os.environ.get('DB_PORT', ''),
+            'DISABLE_SERVER_SIDE_CURSORS': (
+                os.environ.get('DB_DISABLE_SERVER_SIDE_CURSORS') == '1'
+            ),
+        }
+    }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get('DB_NAME', BASE_DIR / 'db.sqlite3'),
+        }
+    }
+
+DATABASES['default'].update({
+    'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 60)),
+    'CONN_HEALTH_CHECKS': True,
+})
+
+# Read replicas: DB_REPLICAS lists replica hosts for PostgreSQL, or database
+# files for SQLite (e.g. copies of db.sqlite3 when trying it out locally).
+# Safe-method requests read from them, see rest_api/routers.py.
+
+DATABASE_REPLICAS = []
+
+_replicas = [replica for replica in os.environ.get('DB_REPLICAS', '').split(',') if replica]
+
+for number, replica in enumerate(_replicas, 1):
+    alias = f'replica_{number}'
+    DATABASES[alias] = {
+        **DATABASES['default'],
+        'HOST' if DB_ENGINE == 'postgresql' else 'NAME': replica,
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['rest_api.routers.ReplicaRouter']
+
+# Seconds a client keeps reading from the primary after it wrote
+
+REPLICA_PIN_SECONDS = 5
+
+# Applied to every SQLite connection, see rest_api/db.py
+
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    'mmap_size': 256 * 1024 * 1024,
+}
+
+
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+# Response cache generations, referral code lookups and replica pins must be
+# seen by every worker. CACHE_BACKEND picks 'redis' or 'memcached' at
+# CACHE_LOCATION, or 'database' (run `manage.py createcachetable` first).
+# The default, 'locmem', only lives in one process: it suits runserver and
+# the tests, and `manage.py check --deploy` rejects it.
+
+CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'locmem')
+
+_CACHE_BACKENDS = {
+    'locmem': ('django.core.cache.backends.locmem.LocMemCache', ''),
+    'redis': ('django.core.cache.backends.redis.RedisCache', 'redis://127.0.0.1:6379'),
+    'memcached': ('django.core.cache.backends.memcached.PyMemcacheCache', '127.0.0.1:11211'),
+    'database': ('django.core.cache.backends.db.DatabaseCache', 'django_cache'),
+}
+
+_cache_backend, _cache_location = _CACHE_BACKENDS[CACHE_BACKEND]
+
+CACHES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'BACKEND': _cache_backend,
+        'LOCATION': os.environ.get('CACHE_LOCATION', _cache_location),
     }
 }
 
 
+# Password hashing
+# https://docs.djangoproject.com/en/5.0/topics/auth/passwords/
+# New passwords use PASSWORD_HASHER ('scrypt', 'argon2' or 'pbkdf2'), existing
+# hashes are re-hashed with it on the next successful login.
+
+PASSWORD_HASHER = os.environ.get('PASSWORD_HASHER', 'scrypt')
+
+_PASSWORD_HASHERS = {
+    'scrypt': 'users.hashers.TunedScryptPasswordHasher',
+    'argon2': 'users.hashers.TunedArgon2PasswordHasher',
+    'pbkdf2': 'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+}
+
+PASSWORD_HASHERS = [_PASSWORD_HASHERS[PASSWORD_HASHER]] + [
+    hasher for name, hasher in _PASSWORD_HASHERS.items() if name != PASSWORD_HASHER
+] + [
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+]
+
+# Processes used by the async views to hash passwords, 0 hashes in threads instead
+
+PASSWORD_HASHING_WORKERS = int(os.environ.get('PASSWORD_HASHING_WORKERS', 2))
+
+PASSWORD_HASHER_OPTIONS = {
+    'scrypt': {
+        'work_factor': int(os.environ.get('SCRYPT_WORK_FACTOR', 2 ** 14)),
+        'block_size': 8,
+        'parallelism': 1,
+    },
+    'argon2': {
+        'time_cost': 2,
+        'memory_cost': 19456,
+        'parallelism': 1,
+    },
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
 
@@ -131,17 +259,80 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
-        'rest_framework.authentication.BasicAuthentication',
-        'rest_framework.authentication.SessionAuthentication',
+        'users.authentication.ProfileAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.AllowAny',
     ),
+    # orjson-backed when orjson is installed, stdlib json otherwise
+    'DEFAULT_RENDERER_CLASSES': (
+        'users.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'users.parsers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.LimitOffsetPagination',
     'PAGE_SIZE': 10
 }
 
+# Authenticator chains used by ProfileAuthentication, picked by route prefix
+# or by a view's `authentication_profile` attribute
+
+AUTHENTICATION_PROFILES = {
+    'api': (
+        'users.authentication.CachedJWTAuthentication',
+    ),
+    'default': (
+        'users.authentication.CachedJWTAuthentication',
+        'rest_framework.authentication.SessionAuthentication',
+    ),
+}
+
+AUTHENTICATION_PROFILE_ROUTES = [
+    ('api/v1/', 'api'),
+]
+
+# Seconds RegisterWithReferralCodeView may cache a referral code
+
+REFERRAL_CODE_CACHE_TTL = 300
+
+# Deepest referral level the downline and network endpoints read, and
+# whether they read it from the ReferralClosure table (see users/network.py)
+# instead of walking the Referral table with a recursive query
+
+REFERRAL_MAX_DEPTH = 20
+REFERRAL_CLOSURE_TABLE = False
+
+# Cached article responses, see users/response_cache.py. Entries are dropped
+# when an article is saved or deleted; TIMEOUT only bounds leftovers.
+
+RESPONSE_CACHE = {
+    'ALIAS': 'default',
+    'TIMEOUT': 300,
+    'LOCK_TIMEOUT': 10,
+    'WAIT': 2,
+    'POLL_INTERVAL': 0.02,
+}
+
+# Per-route request metrics, see rest_api/metrics.py. Served at /metrics/ in
+# the Prometheus text format; scrapers must send TOKEN as a bearer token.
+# Without a token the endpoint answers 403 unless DEBUG is on.
+
+METRICS = {
+    'ENABLED': os.environ.get('METRICS_ENABLED', 'true') == 'true',
+    'TOKEN': os.environ.get('METRICS_TOKEN', ''),
+}
+
+# In-process cache of users authenticated by CachedJWTAuthentication
+
+JWT_USER_CACHE = {
+    'MAX_SIZE': 10000,
+    'TTL': 60,
+}
+
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=5),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=1),
@@ -21,8 +21,13 @@ from django.urls import include, path
 from rest_framework import routers, serializers, viewsets
 from users.views import (
     ArcticleViewSet,
+    ReferralDownlineView,
+    ReferralLeaderboardView,
+    ReferralNetworkView,
     ReferralListView,
     UserRegisterView,
+    BulkUserRegisterView,
+    ExportView,
     UserLoginView,
     UserViewSet,
     ReferralCodeViewSet,
@@ -37,6 +42,7 @@ from rest_framework_simplejwt.views import (
 from drf_yasg.views import get_schema_view
 from drf_yasg import openapi
 from rest_framework import permissions
+from rest_api.metrics import metrics_view
 
 
 router = routers.DefaultRouter()
@@ -61,8 +67,15 @@ urlpatterns = [
     path("admin/", admin.site.urls),
     path("", include(router.urls)),
     path("api-auth/", include("rest_framework.urls")),
+    path("metrics/", metrics_view, name="metrics"),
     path("register/", UserRegisterView.as_view(), name="register"),
     path("login/", UserLoginView.as_view(), name="login"),
+    path(
+        "api/v1/register/bulk/",
+        BulkUserRegisterView.as_view(),
+        name="bulk_register",
+    ),
+    path("api/v1/export/<str:resource>/", ExportView.as_view(), name="export"),
     # Referrals
     path(
         "api/v1/referral/by-email/",
@@ -74,6 +87,21 @@ urlpatterns = [
         ReferralListView.as_view(),
         name="referral_list",
     ),
+    path(
+        "api/v1/referrals/<int:referrer_id>/downline/",
+        ReferralDownlineView.as_view(),
+        name="referral_downline",
+    ),
+    path(
+        "api/v1/referrals/<int:referrer_id>/network/",
+        ReferralNetworkView.as_view(),
+        name="referral_network",
+    ),
+    path(
+        "api/v1/referrals/leaderboard/",
+        ReferralLeaderboardView.as_view(),
+        name="referral_leaderboard",
+    ),
     path(
         "api/v1/referral_code/register/",
         RegisterWithReferralCodeView.as_view(),
@@ -0,0 +1,104 @@
+import copy
+import time
+from functools import lru_cache
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+from django.utils.translation import gettext_lazy as _
+from rest_framework.authentication import BaseAuthentication
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from .cache import TTLCache
+
+JWT_USER_CACHE = getattr(settings, "JWT_USER_CACHE", {})
+
+# Keyed by the token's user id claim, cleared for a user on save/delete (see signals.py)
+user_cache = TTLCache(
+    max_size=JWT_USER_CACHE.get("MAX_SIZE", 10000),
+    ttl=JWT_USER_CACHE.get("TTL", 60),
+)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that keeps recently authenticated users in memory,
+    so most requests don't need to SELECT the user row.
+    """
+
+    def get_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        cached = user_cache.get(user_id) if user_id is not None else None
+        if cached is None:
+            user = super().get_user(validated_token)
+            user_cache.set(user_id, copy.copy(user))
+            return user
+
+        # Users are cached only after passing these checks, repeat the token dependent ones
+        user = copy.copy(cached)
+        if not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(
+                api_settings.REVOKE_TOKEN_CLAIM
+            ) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(
+                    _("The user's password has been changed."), code="password_changed"
+                )
+
+        return user
+
+
+@lru_cache(maxsize=None)
+def get_profile_authentication_classes(profile):
+    return [import_string(path) for path in settings.AUTHENTICATION_PROFILES[profile]]
+
+
+def get_authentication_profile(request, view=None):
+    """
+    The view's `authentication_profile` if it sets one, otherwise the profile
+    of the first AUTHENTICATION_PROFILE_ROUTES prefix the matched route starts with.
+    """
+    profile = getattr(view, "authentication_profile", None)
+    if profile is not None:
+        return profile
+    match = request.resolver_match
+    route = match.route if match is not None else request.path_info.lstrip("/")
+    for prefix, profile in settings.AUTHENTICATION_PROFILE_ROUTES:
+        if route.startswith(prefix):
+            return profile
+    return "default"
+
+
+class ProfileAuthentication(BaseAuthentication):
+    """
+    Runs the authenticator chain of the request's profile (see AUTHENTICATION_PROFILES),
+    so API routes don't pay for authenticators only the browsable API needs.
+    Time spent here is added to `request.authentication_time`.
+    """
+
+    def get_authenticators(self, request):
+        view = request.parser_context.get("view")
+        profile = get_authentication_profile(request._request, view)
+        return [auth() for auth in get_profile_authentication_classes(profile)]
+
+    def authenticate(self, request):
+        start = time.perf_counter()
+        try:
+            for authenticator in self.get_authenticators(request):
+                user_auth_tuple = authenticator.authenticate(request)
+                if user_auth_tuple is not None:
+                    return user_auth_tuple
+            return None
+        finally:
+            request._request.authentication_time = getattr(
+                request._request, "authentication_time", 0.0
+            ) + (time.perf_counter() - start)
+
+    def authenticate_header(self, request):
+        authenticators = self.get_authenticators(request)
+        if authenticators:
+            return authenticators[0].authenticate_header(request)
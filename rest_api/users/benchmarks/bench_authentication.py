@@ -0,0 +1,50 @@
+"""
+JWTAuthentication vs CachedJWTAuthentication on repeated requests.
+
+    python manage.py test users.benchmarks.bench_authentication
+"""
+import time
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.tokens import AccessToken
+
+from users.authentication import CachedJWTAuthentication, user_cache
+
+User = get_user_model()
+
+REQUESTS = 5000
+
+
+class AuthenticationBenchmark(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="bench", password="bench")
+
+    def setUp(self):
+        user_cache.clear()
+        token = AccessToken.for_user(self.user)
+        self.request = APIRequestFactory().get(
+            "/", HTTP_AUTHORIZATION=f"Bearer {token}"
+        )
+
+    def timed(self, authentication):
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            for _ in range(REQUESTS):
+                authentication.authenticate(self.request)
+            elapsed = time.perf_counter() - start
+        return elapsed / REQUESTS, len(queries)
+
+    def test_authenticate(self):
+        plain, plain_queries = self.timed(JWTAuthentication())
+        cached, cached_queries = self.timed(CachedJWTAuthentication())
+        print(
+            f"\n{REQUESTS} requests: JWTAuthentication {plain * 1e6:.1f} us/request"
+            f" ({plain_queries} queries), CachedJWTAuthentication"
+            f" {cached * 1e6:.1f} us/request ({cached_queries} queries)"
+        )
@@ -0,0 +1,82 @@
+"""
+Mixed read/write throughput on a SQLite file: a new connection per request
+with SQLite defaults (the old settings) against persistent per-thread
+connections with SQLITE_PRAGMAS.
+
+    python manage.py test users.benchmarks.bench_database
+"""
+
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.test import SimpleTestCase
+
+from rest_api.db import apply_sqlite_pragmas
+
+THREADS = 8
+REQUESTS = 500
+WRITE_EVERY = 5
+
+
+class DatabaseBenchmark(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "bench.sqlite3")
+        with sqlite3.connect(self.path) as db:
+            db.execute(
+                "CREATE TABLE arcticle (id INTEGER PRIMARY KEY, title TEXT, content TEXT)"
+            )
+            db.executemany(
+                "INSERT INTO arcticle (title, content) VALUES (?, ?)",
+                [(f"Arcticle {i}", "x" * 200) for i in range(1000)],
+            )
+
+    def connect(self, pragmas):
+        db = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+        apply_sqlite_pragmas(db.cursor(), pragmas)
+        return db
+
+    def request(self, db, i):
+        if i % WRITE_EVERY == 0:
+            db.execute(
+                "INSERT INTO arcticle (title, content) VALUES (?, ?)", ("new", "x")
+            )
+        else:
+            db.execute("SELECT id, title FROM arcticle ORDER BY id LIMIT 10").fetchall()
+
+    def worker(self, pragmas, persistent):
+        db = self.connect(pragmas) if persistent else None
+        for i in range(REQUESTS):
+            if persistent:
+                self.request(db, i)
+            else:
+                connection = self.connect(pragmas)
+                self.request(connection, i)
+                connection.close()
+        if db is not None:
+            db.close()
+
+    def throughput(self, pragmas, persistent):
+        threads = [
+            threading.Thread(target=self.worker, args=(pragmas, persistent))
+            for _ in range(THREADS)
+        ]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return THREADS * REQUESTS / (time.perf_counter() - start)
+
+    def test_mixed_throughput(self):
+        before = self.throughput({}, persistent=False)
+        after = self.throughput(settings.SQLITE_PRAGMAS, persistent=True)
+        print(
+            f"\n{THREADS} threads, 1 write every {WRITE_EVERY} requests:"
+            f" before {before:.0f} requests/s, after {after:.0f} requests/s"
+        )
@@ -0,0 +1,77 @@
+"""
+Render and parse time: DRF's JSONRenderer/JSONParser vs FastJSONRenderer/FastJSONParser.
+
+    python manage.py test users.benchmarks.bench_json
+"""
+
+import io
+import time
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from users.models import Arcticle, Referral
+from users.parsers import FastJSONParser
+from users.renderers import FastJSONRenderer, orjson
+from users.serializers import ArcticleSerializer, ReferralSerializer
+
+User = get_user_model()
+
+ROWS = 2_000
+REPEAT = 20
+
+
+def timed(function, payload):
+    function(payload)
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        function(payload)
+    return (time.perf_counter() - start) / REPEAT
+
+
+class JSONBenchmark(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        Arcticle.objects.bulk_create(
+            Arcticle(title=f"Arcticle {i}", content="Lorem ipsum dolor " * 50)
+            for i in range(ROWS)
+        )
+        referrer = User.objects.create_user(username="referrer")
+        referees = User.objects.bulk_create(
+            User(username=f"referee{i}", email=f"referee{i}@example.com")
+            for i in range(ROWS)
+        )
+        Referral.objects.bulk_create(
+            Referral(referrer=referrer, referee=referee) for referee in referees
+        )
+
+    def test_render_and_parse(self):
+        context = {"request": Request(APIRequestFactory().get("/"))}
+        payloads = {
+            "arcticles": ArcticleSerializer(Arcticle.objects.all(), many=True).data,
+            "referrals": ReferralSerializer(
+                Referral.objects.select_related("referrer", "referee"),
+                many=True,
+                context=context,
+            ).data,
+        }
+        print(f"\n{ROWS} rows, orjson {'installed' if orjson else 'missing'}")
+        for name, data in payloads.items():
+            body = JSONRenderer().render(data)
+            self.assertEqual(FastJSONRenderer().render(data), body)
+            results = [
+                timed(renderer().render, data)
+                for renderer in (JSONRenderer, FastJSONRenderer)
+            ] + [
+                timed(lambda body: parser().parse(io.BytesIO(body)), body)
+                for parser in (JSONParser, FastJSONParser)
+            ]
+            print(
+                "{}: render {:.2f} ms -> {:.2f} ms, parse {:.2f} ms -> {:.2f} ms".format(
+                    name, *(seconds * 1000 for seconds in results)
+                )
+            )
@@ -0,0 +1,58 @@
+"""
+UserLoginView throughput under concurrent logins for each password hasher.
+
+    python manage.py test users.benchmarks.bench_login
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth import get_user_model
+from django.db import connections
+from django.test import TransactionTestCase, override_settings
+from rest_framework.test import APIRequestFactory
+
+from users.views import UserLoginView
+
+User = get_user_model()
+
+USERS = 8
+LOGINS = 64
+THREADS = 8
+HASHERS = {
+    "pbkdf2": "django.contrib.auth.hashers.PBKDF2PasswordHasher",
+    "scrypt": "users.hashers.TunedScryptPasswordHasher",
+}
+
+
+class LoginBenchmark(TransactionTestCase):
+    def login(self, i):
+        request = APIRequestFactory().post(
+            "/login/",
+            {"username": f"bench{i % USERS}", "password": "bench-password"},
+            format="json",
+        )
+        try:
+            response = UserLoginView.as_view()(request)
+        finally:
+            connections.close_all()
+        assert response.status_code == 200, response.data
+
+    def run_logins(self):
+        for i in range(USERS):
+            self.login(i)
+        with ThreadPoolExecutor(THREADS) as pool:
+            start = time.perf_counter()
+            list(pool.map(self.login, range(LOGINS)))
+            return LOGINS / (time.perf_counter() - start)
+
+    def test_login_throughput(self):
+        results = []
+        for name, hasher in HASHERS.items():
+            with override_settings(PASSWORD_HASHERS=[hasher]):
+                User.objects.all().delete()
+                for i in range(USERS):
+                    User.objects.create_user(
+                        username=f"bench{i}", password="bench-password"
+                    )
+                results.append(f"{name} {self.run_logins():.1f} logins/s")
+        print(f"\n{LOGINS} logins on {THREADS} threads: " + ", ".join(results))
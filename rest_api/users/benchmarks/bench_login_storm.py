@@ -0,0 +1,101 @@
+"""
+Arcticle read latency under ASGI while a login storm is running, with the
+async UserLoginView and with a synchronous view hashing on the request thread.
+
+    python manage.py test users.benchmarks.bench_login_storm
+"""
+import asyncio
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.test import AsyncClient, TransactionTestCase, override_settings
+from django.urls import include, path
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from rest_framework_simplejwt.tokens import AccessToken
+
+from users.models import Arcticle
+from users.serializers import UserLoginSerializer
+
+User = get_user_model()
+
+LOGINS = 32
+READS = 100
+
+
+class SyncLoginView(APIView):
+    def post(self, request, *args, **kwargs):
+        serializer = UserLoginSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return Response({})
+
+
+urlpatterns = [
+    path("sync-login/", SyncLoginView.as_view()),
+    path("", include("rest_api.urls")),
+]
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class LoginStormBenchmark(TransactionTestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="bench", password="bench")
+        Arcticle.objects.bulk_create(
+            Arcticle(title=f"Arcticle {i}", content="x" * 200) for i in range(10)
+        )
+        self.token = AccessToken.for_user(self.user)
+
+    async def read(self, client):
+        start = time.perf_counter()
+        response = await client.get(
+            "/api/v1/arcticles/", headers={"Authorization": f"Bearer {self.token}"}
+        )
+        assert response.status_code == 200, response.content
+        return time.perf_counter() - start
+
+    async def idle(self):
+        client = AsyncClient()
+        return [await self.read(client) for _ in range(READS)]
+
+    async def storm(self, login_url):
+        client = AsyncClient()
+        data = {"username": "bench", "password": "bench"}
+        # Warm up, this also starts the hashing processes
+        await client.post(login_url, data, content_type="application/json")
+        logins = asyncio.gather(
+            *[
+                client.post(login_url, data, content_type="application/json")
+                for _ in range(LOGINS)
+            ]
+        )
+        # Keep reading for as long as the storm lasts
+        latencies = []
+        while not logins.done():
+            latencies.append(await self.read(client))
+        assert all(response.status_code == 200 for response in await logins)
+        return latencies
+
+    def report(self, name, latencies):
+        latencies = sorted(latencies)
+        p50 = statistics.median(latencies) * 1000
+        p99 = latencies[max(int(len(latencies) * 0.99) - 1, 0)] * 1000
+        return (
+            f"{name}: {len(latencies)} reads, p50 {p50:.1f} ms, p99 {p99:.1f} ms,"
+            f" max {latencies[-1] * 1000:.1f} ms"
+        )
+
+    def test_reads_during_login_storm(self):
+        idle = asyncio.run(self.idle())
+        async_storm = asyncio.run(self.storm("/login/"))
+        sync_storm = asyncio.run(self.storm("/sync-login/"))
+        print(
+            "\narcticle reads, "
+            + "; ".join(
+                [
+                    self.report("idle", idle),
+                    self.report("async login storm", async_storm),
+                    self.report("sync login storm", sync_storm),
+                ]
+            )
+        )
@@ -0,0 +1,52 @@
+"""
+Overhead of MetricsMiddleware on a list request.
+
+    python manage.py test users.benchmarks.bench_metrics
+"""
+
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.test import APITestCase, APIClient
+
+from rest_api import metrics
+from users.models import Referral
+
+User = get_user_model()
+
+REFERRALS = 10
+REPEAT = 500
+
+
+class MetricsBenchmark(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.referrer = User.objects.create_user(username="referrer")
+        for i in range(REFERRALS):
+            Referral.objects.create(
+                referrer=cls.referrer,
+                referee=User.objects.create_user(username=f"referee{i}"),
+            )
+
+    def timed(self):
+        # A new client loads the middleware settings in effect
+        client = APIClient()
+        url = reverse("referral_list", args=[self.referrer.id])
+        client.get(url)
+        start = time.perf_counter()
+        for _ in range(REPEAT):
+            client.get(url)
+        return (time.perf_counter() - start) / REPEAT
+
+    def test_overhead(self):
+        with override_settings(METRICS={**settings.METRICS, "ENABLED": False}):
+            off = self.timed()
+        on = self.timed()
+        metrics.registry.reset()
+        print(
+            f"\nreferral list: {off * 1000:.3f} ms without metrics,"
+            f" {on * 1000:.3f} ms with ({(on - off) * 1e6:.1f} us per request)"
+        )
@@ -0,0 +1,76 @@
+"""
+Page 1000 latency: limit/offset vs keyset pagination.
+
+    python manage.py test users.benchmarks.bench_pagination
+"""
+import time
+from base64 import b64encode
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from users.models import Arcticle
+
+User = get_user_model()
+
+ROWS = 50_000
+PAGE_SIZE = 10
+PAGE = 1000
+REPEAT = 20
+
+
+def encode_cursor(position):
+    query = urlencode({"p": position})
+    return b64encode(query.encode("ascii")).decode("ascii")
+
+
+# Measure the queries, not the response cache
+@override_settings(
+    CACHES={
+        "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+        "dummy": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"},
+    },
+    RESPONSE_CACHE={**settings.RESPONSE_CACHE, "ALIAS": "dummy"},
+)
+class PaginationBenchmark(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        Arcticle.objects.bulk_create(
+            Arcticle(title=f"Arcticle {i}", content="x" * 200) for i in range(ROWS)
+        )
+        cls.user = User.objects.create_user(username="bench", password="bench")
+
+    def setUp(self):
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse("arcticle-list")
+
+    def timed(self, params):
+        self.client.get(self.url, params)
+        start = time.perf_counter()
+        for _ in range(REPEAT):
+            response = self.client.get(self.url, params)
+        elapsed = (time.perf_counter() - start) / REPEAT
+        self.assertEqual(len(response.data["results"]), PAGE_SIZE)
+        return elapsed
+
+    def test_page_1000(self):
+        offset = (PAGE - 1) * PAGE_SIZE
+        last_id_before_page = (
+            Arcticle.objects.order_by("id").values_list("id", flat=True)[offset - 1]
+        )
+        limit_offset = self.timed({"limit": PAGE_SIZE, "offset": offset})
+        cursor = self.timed(
+            {
+                "pagination": "cursor",
+                "limit": PAGE_SIZE,
+                "cursor": encode_cursor(last_id_before_page),
+            }
+        )
+        print(
+            f"\npage {PAGE} of {ROWS} rows: limit/offset {limit_offset * 1000:.2f} ms,"
+            f" cursor {cursor * 1000:.2f} ms"
+        )
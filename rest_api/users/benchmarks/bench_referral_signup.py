@@ -0,0 +1,60 @@
+"""
+Database reads per signup on a hot referral code, with and without the
+referral code cache.
+
+    python manage.py test users.benchmarks.bench_referral_signup
+"""
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from users.models import ReferralCode
+
+User = get_user_model()
+
+SIGNUPS = 50
+
+
+class ReferralSignupBenchmark(APITestCase):
+    def setUp(self):
+        referrer = User.objects.create_user(username="referrer")
+        ReferralCode.objects.create(
+            user=referrer,
+            code="campaign",
+            expiration_date=timezone.now() + timezone.timedelta(days=30),
+        )
+        self.url = reverse("register_with_referral")
+
+    def signups(self, prefix):
+        with CaptureQueriesContext(connection) as queries:
+            for i in range(SIGNUPS):
+                response = self.client.post(
+                    self.url,
+                    {
+                        "referral_code": "campaign",
+                        "username": f"{prefix}{i}",
+                        "password": "password123",
+                    },
+                    format="json",
+                )
+                assert response.status_code == 201, response.data
+        return sum(query["sql"].startswith("SELECT") for query in queries) / SIGNUPS
+
+    def test_reads_per_signup(self):
+        cache.clear()
+        cached = self.signups("cached")
+        with override_settings(
+            CACHES={
+                "default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}
+            }
+        ):
+            uncached = self.signups("uncached")
+        print(
+            f"\nSELECTs per signup: without cache {uncached:.2f}, with cache {cached:.2f}"
+        )
@@ -0,0 +1,58 @@
+"""
+Article search: the full-text index vs an icontains scan.
+
+    python manage.py test users.benchmarks.bench_search
+"""
+
+import random
+import time
+
+from django.db.models import Q
+from django.test import TestCase
+
+from users.models import Arcticle
+from users.search import search_arcticles
+
+ROWS = 50_000
+WORDS = 2_000
+PAGE_SIZE = 10
+REPEAT = 20
+
+
+class SearchBenchmark(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        rng = random.Random(0)
+        words = [f"w{i:04d}x" for i in range(WORDS)]
+        Arcticle.objects.bulk_create(
+            Arcticle(
+                title=" ".join(rng.choices(words, k=5)),
+                content=" ".join(rng.choices(words, k=100)),
+            )
+            for _ in range(ROWS)
+        )
+
+    def timed(self, queryset):
+        list(queryset[:PAGE_SIZE])
+        start = time.perf_counter()
+        for _ in range(REPEAT):
+            count = queryset.count()
+            page = list(queryset.values_list("id", "title")[:PAGE_SIZE])
+        elapsed = (time.perf_counter() - start) / REPEAT
+        return elapsed, count, page
+
+    def test_search(self):
+        # Two rare words, so most of a scan is spent on rows that don't match
+        terms = ["w1234x", "w0042x"]
+        icontains = Arcticle.objects.filter(
+            *(Q(title__icontains=term) | Q(content__icontains=term) for term in terms)
+        ).order_by("id")
+        scan, scan_count, _ = self.timed(icontains)
+        index, index_count, _ = self.timed(
+            search_arcticles(Arcticle.objects.all(), " ".join(terms))
+        )
+        print(
+            f"\n{ROWS} rows, count + first page: icontains {scan * 1000:.2f} ms"
+            f" ({scan_count} rows), full-text {index * 1000:.2f} ms"
+            f" ({index_count} rows)"
+        )
@@ -0,0 +1,82 @@
+"""
+List serialization time: ModelSerializer(many=True) vs the compiled fast path.
+
+    python manage.py test users.benchmarks.bench_serializers
+"""
+
+import time
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from users.fastpath import serialize_rows
+from users.models import Arcticle, Referral, ReferralCode
+from users.serializers import (
+    ArcticleSerializer,
+    ReferralCodeSerializer,
+    ReferralSerializer,
+)
+
+User = get_user_model()
+
+ROWS = 2_000
+REPEAT = 10
+
+
+def timed(function):
+    function()
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        result = function()
+    return (time.perf_counter() - start) / REPEAT, result
+
+
+class SerializerBenchmark(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        Arcticle.objects.bulk_create(
+            Arcticle(title=f"Arcticle {i}", content="Lorem ipsum dolor " * 50)
+            for i in range(ROWS)
+        )
+        referrer = User.objects.create_user(username="referrer")
+        users = User.objects.bulk_create(
+            User(username=f"user{i}", email=f"user{i}@example.com") for i in range(ROWS)
+        )
+        Referral.objects.bulk_create(
+            Referral(referrer=referrer, referee=user) for user in users
+        )
+        ReferralCode.objects.bulk_create(
+            ReferralCode(user=user, code=f"code{i}", expiration_date=timezone.now())
+            for i, user in enumerate(users)
+        )
+
+    def test_list_serialization(self):
+        context = {"request": Request(APIRequestFactory().get("/"))}
+        cases = {
+            "arcticles": (ArcticleSerializer, Arcticle.objects.all()),
+            "referral codes": (ReferralCodeSerializer, ReferralCode.objects.all()),
+            "referrals": (
+                ReferralSerializer,
+                Referral.objects.select_related("referrer", "referee"),
+            ),
+        }
+        print(f"\n{ROWS} rows, query included")
+        for name, (serializer_class, queryset) in cases.items():
+            regular, data = timed(
+                lambda: serializer_class(
+                    queryset.all(), many=True, context=context
+                ).data
+            )
+            fast, fast_data = timed(
+                lambda: serialize_rows(
+                    serializer_class(context=context), queryset.all()
+                )
+            )
+            self.assertEqual(fast_data, data)
+            print(
+                f"{name}: {regular * 1000:.2f} ms -> {fast * 1000:.2f} ms"
+                f" ({regular / fast:.1f}x)"
+            )
@@ -0,0 +1,158 @@
+"""
+Bulk user registration from JSON Lines or CSV streams.
+
+Rows are validated one by one, but username/email uniqueness is checked with
+one query per chunk, passwords are hashed in parallel (see users.passwords)
+and users are inserted with bulk_create. Invalid rows are reported, they
+don't abort the import.
+"""
+
+import csv
+import json
+from itertools import islice
+
+from django.contrib.auth.models import User
+from django.db import IntegrityError, transaction
+from django.db.models.functions import Lower
+
+from .passwords import make_passwords
+from .serializers import BulkUserRegistrationSerializer
+
+FORMATS = {
+    "application/jsonl": "jsonl",
+    "application/x-ndjson": "jsonl",
+    "application/x-jsonlines": "jsonl",
+    "text/csv": "csv",
+}
+
+USERNAME_TAKEN = "A user with that username already exists."
+EMAIL_TAKEN = "A user with that email already exists."
+
+
+def decode_lines(lines):
+    """
+    Decodes UTF-8 byte lines. Invalid bytes are kept as lone surrogates, so
+    read_rows() can reject the rows that contain them instead of failing the
+    whole import.
+    """
+    for line in lines:
+        yield line.decode("utf-8", "surrogateescape")
+
+
+def _is_valid_text(data):
+    try:
+        json.dumps(data, ensure_ascii=False).encode("utf-8")
+    except UnicodeEncodeError:
+        return False
+    return True
+
+
+def read_rows(lines, format):
+    """
+    Yields `(row, data)` for every record in `lines`, counting rows from 1.
+    `data` is None when the record can't be parsed or isn't valid UTF-8.
+    """
+    if format == "csv":
+        for row, data in enumerate(csv.DictReader(lines), start=1):
+            yield row, data if _is_valid_text(data) else None
+        return
+
+    row = 0
+    for line in lines:
+        if not line.strip():
+            continue
+        row += 1
+        try:
+            data = json.loads(line)
+        except ValueError:
+            data = None
+        valid = isinstance(data, dict) and _is_valid_text(data)
+        yield row, data if valid else None
+
+
+def register_users(rows, chunk_size=1000):
+    """
+    Creates users from `(row, data)` pairs.
+    Returns the number of users created and the errors of the skipped rows.
+    """
+    report = {"created": 0, "errors": []}
+    seen_usernames = set()
+    seen_emails = set()
+    rows = iter(rows)
+    while chunk := list(islice(rows, chunk_size)):
+        register_chunk(chunk, report, seen_usernames, seen_emails)
+    report["errors"].sort(key=lambda error: error["row"])
+    return report
+
+
+def register_chunk(chunk, report, seen_usernames, seen_emails):
+    errors = report["errors"]
+
+    valid = []
+    for row, data in chunk:
+        if data is None:
+            errors.append(
+                {"row": row, "errors": {"non_field_errors": ["Invalid row."]}}
+            )
+            continue
+        serializer = BulkUserRegistrationSerializer(data=data)
+        if not serializer.is_valid():
+            errors.append({"row": row, "errors": serializer.errors})
+            continue
+        valid.append((row, serializer.validated_data))
+
+    taken_usernames = set(
+        User.objects.filter(
+            username__in=[data["username"] for _, data in valid]
+        ).values_list("username", flat=True)
+    )
+    taken_emails = set(
+        User.objects.annotate(email_lower=Lower("email"))
+        .filter(
+            email_lower__in=[
+                data["email"].lower() for _, data in valid if data.get("email")
+            ]
+        )
+        .values_list("email_lower", flat=True)
+    )
+
+    accepted = []
+    for row, data in valid:
+        username = data["username"]
+        email = data.get("email", "").lower()
+        if username in taken_usernames or username in seen_usernames:
+            errors.append({"row": row, "errors": {"username": [USERNAME_TAKEN]}})
+            continue
+        if email and (email in taken_emails or email in seen_emails):
+            errors.append({"row": row, "errors": {"email": [EMAIL_TAKEN]}})
+            continue
+        seen_usernames.add(username)
+        if email:
+            seen_emails.add(email)
+        accepted.append((row, data))
+
+    passwords = make_passwords([data["password"] for _, data in accepted])
+    users = [
+        (
+            row,
+            User(
+                username=data["username"],
+                email=data.get("email", ""),
+                password=password,
+            ),
+        )
+        for (row, data), password in zip(accepted, passwords)
+    ]
+    try:
+        with transaction.atomic():
+            User.objects.bulk_create([user for _, user in users])
+        report["created"] += len(users)
+    except IntegrityError:
+        # Someone else registered one of these users meanwhile, find which row by row
+        for row, user in users:
+            try:
+                with transaction.atomic():
+                    user.save()
+                report["created"] += 1
+            except IntegrityError:
+                errors.append({"row": row, "errors": {"username": [USERNAME_TAKEN]}})
@@ -0,0 +1,171 @@
+"""
+Collision-free referral codes.
+
+A referral code is the id of its ReferralCode row run through a keyed
+Feistel permutation of 64-bit integers and encoded as 13 base32 characters.
+Distinct ids always give distinct codes, so codes can be generated in bulk
+without checking the table for collisions. Ids are never reused, so a user
+who deletes a leaked code gets a new one, and codes don't reveal how many
+there are. A row is inserted with a random placeholder code and gets its
+real code in the same transaction, once its id is known.
+
+Codes issued before were derived from user ids; ids here get the top bit
+set, so they never collide with those. Legacy codes are 20 characters long
+and can't clash with either.
+"""
+
+import base64
+import hashlib
+import hmac
+import secrets
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from .models import ReferralCode
+
+REFERRAL_CODE_LIFETIME = timezone.timedelta(days=30)
+
+ROUNDS = 4
+MASK = 0xFFFFFFFF
+# Keeps row ids apart from the user ids earlier codes were derived from
+ID_DOMAIN = 1 << 63
+
+
+def _round_keys():
+    secret = settings.SECRET_KEY.encode()
+    return [
+        hashlib.sha256(secret + b"referral-code-%d" % i).digest() for i in range(ROUNDS)
+    ]
+
+
+def _round(key, value):
+    digest = hmac.new(key, value.to_bytes(4, "big"), hashlib.sha256).digest()
+    return int.from_bytes(digest[:4], "big")
+
+
+def permute(value, keys=None):
+    keys = keys or _round_keys()
+    left, right = value >> 32 & MASK, value & MASK
+    for key in keys:
+        left, right = right, left ^ _round(key, right)
+    return left << 32 | right
+
+
+def encode_referral_code(referral_code_id, keys=None):
+    data = permute(referral_code_id | ID_DOMAIN, keys).to_bytes(8, "big")
+    return base64.b32encode(data).decode("ascii").rstrip("=").lower()
+
+
+def pending_referral_code():
+    """A unique placeholder for a row whose id, and so code, isn't known yet."""
+    return "~" + secrets.token_urlsafe(14)[:19]
+
+
+@transaction.atomic
+def save_referral_code(save):
+    """
+    Inserts a referral code with `save(code)`, which returns the new row,
+    then gives the row its real code. Returns the row.
+    """
+    referral_code = save(pending_referral_code())
+    referral_code.code = encode_referral_code(referral_code.pk)
+    referral_code.save(update_fields=["code"])
+    return referral_code
+
+
+def issue_referral_codes(users, expiration_date=None, chunk_size=1000):
+    """
+    Creates referral codes for the users in the `users` queryset that don't have
+    one yet, with one bulk insert and one bulk update per chunk. Returns the
+    number of codes issued.
+    """
+    expiration_date = expiration_date or timezone.now() + REFERRAL_CODE_LIFETIME
+    keys = _round_keys()
+    users = users.filter(referralcode__isnull=True).order_by("id")
+    issued = 0
+    last_id = 0
+    while chunk := list(
+        users.filter(id__gt=last_id).values_list("id", flat=True)[:chunk_size]
+    ):
+        with transaction.atomic():
+            placeholders = [pending_referral_code() for _ in chunk]
+            ReferralCode.objects.bulk_create(
+                [
+                    ReferralCode(
+                        user_id=user_id, code=code, expiration_date=expiration_date
+                    )
+                    for user_id, code in zip(chunk, placeholders)
+                ],
+                # A user may have created their code meanwhile, keep that one
+                ignore_conflicts=True,
+            )
+            # Conflicting rows weren't inserted and don't come back
+            created = list(
+                ReferralCode.objects.filter(code__in=placeholders).only("id")
+            )
+            for referral_code in created:
+                referral_code.code = encode_referral_code(referral_code.pk, keys)
+            ReferralCode.objects.bulk_update(created, ["code"])
+        issued += len(created)
+        last_id = chunk[-1]
+    return issued
+
+
+def delete_expired_referral_codes(before=None, batch_size=1000, sleep=0):
+    """
+    Deletes the codes that expired before `before` (default: now), oldest
+    first, `batch_size` at a time with `sleep` seconds between batches so the
+    table is never locked for long. Returns the number of codes deleted.
+    """
+    before = before or timezone.now()
+    expired = ReferralCode.objects.expired(before)
+    deleted = 0
+    while ids := list(
+        expired.order_by("expiration_date").values_list("id", flat=True)[:batch_size]
+    ):
+        if deleted:
+            time.sleep(sleep)
+        # Re-check the expiration, a code may have been renewed meanwhile
+        _, counts = expired.filter(id__in=ids).delete()
+        deleted += counts.get(ReferralCode._meta.label, 0)
+        if len(ids) < batch_size:
+            break
+    return deleted
+
+
+def referral_code_cache_key(code):
+    # Codes come from clients, hashed they always make a valid memcached key
+    return "referral_code:" + hashlib.sha256(code.encode()).hexdigest()
+
+
+async def aget_referral_code(code):
+    """
+    Returns `(user_id, expiration_date)` of the referral code, or None if
+    there is no such code or it has expired.
+
+    Read-through cache for signups: entries live for REFERRAL_CODE_CACHE_TTL
+    seconds but never past the code's expiration, and are dropped when the
+    code is saved or deleted (see signals.py). The cache must be shared by
+    all workers for that to reach them (see CACHES).
+    """
+    key = referral_code_cache_key(code)
+    referral_code = await cache.aget(key)
+    if referral_code is not None:
+        return referral_code
+
+    referral_code = (
+        await ReferralCode.objects.active()
+        .filter(code=code)
+        .values_list("user_id", "expiration_date")
+        .afirst()
+    )
+    if referral_code is not None:
+        expires_in = (referral_code[1] - timezone.now()).total_seconds()
+        timeout = min(settings.REFERRAL_CODE_CACHE_TTL, int(expires_in))
+        if timeout > 0:
+            await cache.aset(key, referral_code, timeout)
+    return referral_code
@@ -0,0 +1,63 @@
+import hashlib
+
+from django.core.exceptions import ValidationError
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
+
+from .models import Arcticle
+from .response_cache import get_generation, get_response_cache
+
+
+def arcticle_version(request, pk=None):
+    """
+    Return the version of one article, its `updated_at`, or of the whole
+    collection when `pk` is None: the response cache's list generation, which
+    every save and delete bumps (see signals.py), so no query is needed.
+    None when there is no such article. Looked up once per request.
+    """
+    cache = getattr(request, "_arcticle_versions", None)
+    if cache is None:
+        cache = request._arcticle_versions = {}
+    if pk not in cache:
+        if pk is None:
+            cache[pk] = get_generation(get_response_cache(), "arcticles")
+        else:
+            try:
+                cache[pk] = (
+                    Arcticle.objects.filter(pk=pk)
+                    .values_list("updated_at", flat=True)
+                    .first()
+                )
+            except (ValueError, TypeError, ValidationError):
+                # Not a valid id, the view answers 404 itself
+                cache[pk] = None
+    return cache[pk]
+
+
+def arcticle_etag(request, pk=None, **kwargs):
+    version = arcticle_version(request, pk)
+    if version is None:
+        return None
+    # The representation depends on the query string (?fields=, paging) and
+    # the negotiated renderer, so both are part of the validator
+    key = "|".join(
+        [
+            str(pk),
+            version if pk is None else version.isoformat(),
+            request.GET.urlencode(),
+            getattr(request, "accepted_media_type", "") or "",
+        ]
+    )
+    return hashlib.sha256(key.encode()).hexdigest()[:32]
+
+
+def arcticle_last_modified(request, pk=None, **kwargs):
+    if pk is None:
+        # The collection has no modification time, deletions don't leave one
+        return None
+    return arcticle_version(request, pk)
+
+
+conditional_arcticle = method_decorator(
+    condition(etag_func=arcticle_etag, last_modified_func=arcticle_last_modified)
+)
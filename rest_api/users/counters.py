@@ -0,0 +1,65 @@
+"""
+Denormalized per-user referral counts.
+
+Counters are changed with F() expressions in the transaction that creates or
+deletes the Referral (see users.signals), so concurrent signups never lose an
+increment. Bulk writes skip signals; reconcile_referral_counts() rebuilds the
+counters from the Referral table afterwards.
+"""
+
+from django.db import transaction
+from django.db.models import Count, F
+
+from .models import Referral, ReferralCounter
+
+
+def add_referrals(user_id, delta):
+    """Adds `delta` (which may be negative) to the referral count of `user_id`."""
+    counters = ReferralCounter.objects.filter(pk=user_id)
+    if delta < 0:
+        # A counter that is already behind (rows bulk-created without
+        # signals) stays put until the next reconcile instead of going negative
+        counters.filter(count__gte=-delta).update(count=F("count") + delta)
+        return
+    if counters.update(count=F("count") + delta):
+        return
+    # First referral of this user; get_or_create copes with a concurrent first
+    _, created = ReferralCounter.objects.get_or_create(
+        pk=user_id, defaults={"count": delta}
+    )
+    if not created:
+        counters.update(count=F("count") + delta)
+
+
+@transaction.atomic
+def reconcile_referral_counts(batch_size=1000):
+    """
+    Recounts every user's referrals with one GROUP BY and writes the result
+    with batched upserts. Returns the number of users that have referrals.
+    """
+    counts = (
+        Referral.objects.order_by()
+        .values_list("referrer")
+        .annotate(count=Count("id"))
+        .iterator(chunk_size=batch_size)
+    )
+    written = 0
+    batch = []
+    for user_id, count in counts:
+        batch.append(ReferralCounter(user_id=user_id, count=count))
+        if len(batch) == batch_size:
+            written += _upsert(batch)
+            batch = []
+    written += _upsert(batch)
+
+    ReferralCounter.objects.filter(count__gt=0).exclude(
+        user__in=Referral.objects.values("referrer")
+    ).update(count=0)
+    return written
+
+
+def _upsert(counters):
+    ReferralCounter.objects.bulk_create(
+        counters, update_conflicts=True, unique_fields=["user"], update_fields=["count"]
+    )
+    return len(counters)
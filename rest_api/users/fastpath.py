@@ -0,0 +1,261 @@
+"""
+Read-only fast path for list responses.
+
+A serializer's readable fields are compiled once into a function that turns a
+`.values_list()` row into the dict `serializer.data` would contain, skipping
+model instances and the per-field `get_attribute`/`to_representation` calls.
+"""
+
+import functools
+from types import SimpleNamespace
+
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+from rest_framework.response import Response
+
+from rest_api import metrics
+
+# Serializer fields whose to_representation returns values read from these
+# model field types unchanged
+IDENTITY_FIELDS = {
+    serializers.BooleanField: {"BooleanField"},
+    serializers.CharField: {"CharField", "EmailField", "SlugField", "TextField"},
+    serializers.IntegerField: {
+        "AutoField",
+        "BigAutoField",
+        "BigIntegerField",
+        "IntegerField",
+        "PositiveIntegerField",
+        "PositiveSmallIntegerField",
+        "SmallAutoField",
+        "SmallIntegerField",
+    },
+}
+
+
+class NotCompilable(Exception):
+    pass
+
+
+class RowReader:
+    """
+    `columns` go to `values_list()`; calling the reader with a row returns
+    the serialized dict.
+    """
+
+    def __init__(self, serializer, queryset):
+        self.columns = []
+        self.converters = []
+        layout = self._layout(serializer, queryset.model, queryset, "")
+        self.row = _build(tuple(layout))(tuple(self.converters))
+
+    def __call__(self, row):
+        return self.row(row)
+
+    def _column(self, path):
+        if path not in self.columns:
+            self.columns.append(path)
+        return self.columns.index(path)
+
+    def _converter(self, function):
+        self.converters.append(function)
+        return len(self.converters) - 1
+
+    def _layout(self, serializer, model, queryset, prefix):
+        """
+        Returns a hashable description of the generated dict: one
+        (name, kind, column, converter or nested layout) entry per field.
+        """
+        # Looked up through the MRO, so an override in any base counts too
+        if type(serializer).to_representation is not (
+            serializers.Serializer.to_representation
+        ):
+            raise NotCompilable(
+                f"{type(serializer).__name__} overrides to_representation"
+            )
+        layout = []
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            if isinstance(field, serializers.HyperlinkedIdentityField):
+                layout.append(self._hyperlink(name, field, prefix))
+                continue
+            if field.source == "*":
+                raise NotCompilable(f"{name}: unsupported source {field.source!r}")
+            *path, attr = field.source_attrs
+            source_model, source_prefix = model, prefix
+            for step in path:
+                # Dotted sources follow required forward to-one relations
+                relation = self._model_field(source_model, None, step)
+                if not (relation.concrete and relation.is_relation) or relation.null:
+                    raise NotCompilable(f"{name}: unsupported source {field.source!r}")
+                source_model = relation.related_model
+                source_prefix = f"{source_prefix}{step}__"
+            model_field = self._model_field(
+                source_model, None if path else queryset, attr
+            )
+            if model_field.is_relation and attr == getattr(
+                model_field, "attname", None
+            ):
+                # `<relation>_id` is the raw key value
+                model_field = model_field.target_field
+            lookup = f"{source_prefix}{attr}"
+
+            if isinstance(field, serializers.BaseSerializer):
+                if isinstance(field, serializers.ListSerializer) or not (
+                    model_field.many_to_one or model_field.one_to_one
+                ):
+                    raise NotCompilable(f"{name}: only to-one relations nest")
+                nested = self._layout(
+                    field, model_field.related_model, None, f"{lookup}__"
+                )
+                # A null relation serializes as None, like DRF does
+                null = self._column(lookup) if model_field.null else None
+                layout.append((name, "nested", null, tuple(nested)))
+            elif isinstance(field, serializers.PrimaryKeyRelatedField):
+                if field.pk_field is not None or not model_field.many_to_one:
+                    raise NotCompilable(f"{name}: unsupported related field")
+                layout.append((name, "value", self._column(lookup), None))
+            elif isinstance(
+                field, (serializers.RelatedField, serializers.ManyRelatedField)
+            ):
+                raise NotCompilable(f"{name}: unsupported related field")
+            elif isinstance(field, serializers.SerializerMethodField):
+                raise NotCompilable(f"{name}: method fields need the instance")
+            elif model_field.is_relation:
+                raise NotCompilable(f"{name}: relations need a related field")
+            else:
+                column = self._column(lookup)
+                if self._is_identity(field, model_field):
+                    layout.append((name, "value", column, None))
+                else:
+                    converter = self._converter(field.to_representation)
+                    layout.append((name, "convert", column, converter))
+        return layout
+
+    def _model_field(self, model, queryset, attr):
+        if queryset is not None and attr in queryset.query.annotations:
+            return queryset.query.annotations[attr].output_field
+        try:
+            return model._meta.get_field(attr)
+        except FieldDoesNotExist:
+            raise NotCompilable(f"{attr} is not a column of {model.__name__}")
+
+    def _is_identity(self, field, model_field):
+        if type(field) is serializers.ReadOnlyField:
+            return True
+        for cls, internal_types in IDENTITY_FIELDS.items():
+            if (
+                isinstance(field, cls)
+                and type(field).to_representation is cls.to_representation
+            ):
+                return model_field.get_internal_type() in internal_types
+        return False
+
+    def _hyperlink(self, name, field, prefix):
+        request = field.context.get("request")
+        if request is None:
+            raise NotCompilable(f"{name}: hyperlinks need the request")
+        format = field.context.get("format")
+        if format and field.format and field.format != format:
+            format = field.format
+        lookup_field = field.lookup_field
+
+        def url(value):
+            obj = SimpleNamespace(**{lookup_field: value, "pk": value})
+            return field.get_url(obj, field.view_name, request, format)
+
+        column = self._column(f"{prefix}{lookup_field}")
+        return (name, "convert", column, self._converter(url))
+
+
+def _expression(layout):
+    items = []
+    for name, kind, column, extra in layout:
+        if kind == "value":
+            value = f"r[{column}]"
+        elif kind == "convert":
+            value = f"None if r[{column}] is None else c{extra}(r[{column}])"
+        else:
+            value = _expression(extra)
+            if column is not None:
+                value = f"None if r[{column}] is None else {value}"
+        items.append(f"{name!r}: {value}")
+    return "{" + ", ".join(items) + "}"
+
+
+@functools.lru_cache(maxsize=256)
+def _build(layout):
+    """
+    Generates the row function for a layout once; the converters of a given
+    request are bound by calling the returned factory.
+    """
+    converters = sorted(
+        {extra for _, kind, _, extra in _walk(layout) if kind == "convert"}
+    )
+    source = "\n".join(
+        [
+            "def factory(converters):",
+            *(f"    c{i} = converters[{i}]" for i in converters),
+            "    def row(r):",
+            f"        return {_expression(layout)}",
+            "    return row",
+        ]
+    )
+    namespace = {}
+    exec(compile(source, "<fastpath>", "exec"), namespace)
+    return namespace["factory"]
+
+
+def _walk(layout):
+    for entry in layout:
+        yield entry
+        if entry[1] == "nested":
+            yield from _walk(entry[3])
+
+
+def serialize_rows(serializer, queryset):
+    """
+    Serialize `queryset` with `serializer`'s fields, or return None when the
+    serializer can't be compiled and the regular path has to be used.
+    """
+    try:
+        reader = RowReader(serializer, queryset)
+    except NotCompilable:
+        return None
+    return [reader(row) for row in queryset.values_list(*reader.columns)]
+
+
+class FastListMixin:
+    """
+    List action for generic views that serializes pages with a RowReader.
+    Falls back to the regular `list` when the serializer isn't compilable.
+    """
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        try:
+            reader = RowReader(self.get_serializer(), queryset)
+        except NotCompilable:
+            return super().list(request, *args, **kwargs)
+
+        # Named rows let cursor pagination read its ordering fields by name
+        columns = reader.columns + [
+            name for name in self.paginator_ordering() if name not in reader.columns
+        ]
+        rows = queryset.values_list(*columns, named=True)
+        page = self.paginate_queryset(rows)
+        with metrics.timed("serialize"):
+            data = [reader(row) for row in (rows if page is None else page)]
+        if page is None:
+            return Response(data)
+        return self.get_paginated_response(data)
+
+    def paginator_ordering(self):
+        paginator = self.paginator
+        # LimitOffsetOrCursorPagination hands cursor requests to another class
+        paginator = getattr(paginator, "cursor_pagination_class", paginator)
+        ordering = getattr(paginator, "ordering", None) or ()
+        if isinstance(ordering, str):
+            ordering = (ordering,)
+        return [name.lstrip("-") for name in ordering]
@@ -0,0 +1,21 @@
+from django_filters import rest_framework as filters
+
+from .models import Arcticle
+from .search import search_arcticles
+from .serializers import ArcticleListSerializer
+
+
+class ArcticleFilter(filters.FilterSet):
+    q = filters.CharFilter(
+        method="search", label="Full-text search, best matches first"
+    )
+    updated_after = filters.IsoDateTimeFilter(field_name="updated_at", lookup_expr="gt")
+
+    class Meta:
+        model = Arcticle
+        fields = ["q", "updated_after"]
+
+    def search(self, queryset, name, value):
+        # Snippets cost a pass over each match's text, only build them on request
+        fields = ArcticleListSerializer.requested_fields(self.request) or ()
+        return search_arcticles(queryset, value, snippets="snippet" in fields)
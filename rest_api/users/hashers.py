@@ -0,0 +1,29 @@
+from django.conf import settings
+from django.contrib.auth.hashers import Argon2PasswordHasher, ScryptPasswordHasher
+from django.core.exceptions import ImproperlyConfigured
+
+
+class TunedHasherMixin:
+    """
+    Reads the hasher's cost parameters from PASSWORD_HASHER_OPTIONS[algorithm].
+    Hashes made with other parameters are upgraded on the next successful login.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        options = getattr(settings, "PASSWORD_HASHER_OPTIONS", {})
+        for name, value in options.get(self.algorithm, {}).items():
+            if not hasattr(type(self), name):
+                raise ImproperlyConfigured(
+                    f"Unknown {self.algorithm} password hasher option: {name}"
+                )
+            setattr(self, name, value)
+
+
+class TunedScryptPasswordHasher(TunedHasherMixin, ScryptPasswordHasher):
+    pass
+
+
+class TunedArgon2PasswordHasher(TunedHasherMixin, Argon2PasswordHasher):
+    # Requires argon2-cffi
+    pass
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from users.codes import delete_expired_referral_codes
+
+
+class Command(BaseCommand):
+    help = (
+        "Deletes expired referral codes in batches. Meant to run periodically, "
+        "e.g. from cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=0,
+            help="Keep codes that expired less than this many days ago.",
+        )
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--sleep",
+            type=float,
+            default=0.1,
+            help="Seconds to wait between batches.",
+        )
+
+    def handle(self, *args, **options):
+        before = timezone.now() - timezone.timedelta(days=options["days"])
+        deleted = delete_expired_referral_codes(
+            before, options["batch_size"], options["sleep"]
+        )
+        self.stdout.write(
+            self.style.SUCCESS(f"Deleted {deleted} expired referral codes.")
+        )
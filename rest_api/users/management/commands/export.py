@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from users.export import EXPORTS, stream_rows
+
+FILTERS = sorted({name for export in EXPORTS.values() for name in export.filters})
+
+
+class Command(BaseCommand):
+    help = "Streams articles, users or referrals as JSON Lines or CSV."
+
+    def add_arguments(self, parser):
+        parser.add_argument("resource", choices=sorted(EXPORTS))
+        parser.add_argument("--format", choices=["jsonl", "csv"], default="jsonl")
+        parser.add_argument(
+            "--output", default="-", help='File to write, "-" writes stdout.'
+        )
+        parser.add_argument("--chunk-size", type=int, default=2000)
+        for name in FILTERS:
+            parser.add_argument(
+                f"--{name.replace('_', '-')}",
+                dest=name,
+                help="Filter, see users/export.py for the resources that take it.",
+            )
+
+    def handle(self, *args, **options):
+        export = EXPORTS[options["resource"]]
+        filters = {name: options[name] for name in FILTERS if options[name]}
+        try:
+            queryset = export.get_queryset(filters)
+        except ValueError as exc:
+            raise CommandError(exc)
+
+        chunks = stream_rows(export, queryset, options["format"], options["chunk_size"])
+        if options["output"] == "-":
+            for chunk in chunks:
+                self.stdout.write(chunk, ending="")
+        else:
+            with open(options["output"], "w", newline="", encoding="utf-8") as output:
+                output.writelines(chunks)
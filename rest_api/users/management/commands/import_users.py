@@ -0,0 +1,42 @@
+import json
+import sys
+
+from django.core.management.base import BaseCommand
+
+from users import bulk
+
+
+class Command(BaseCommand):
+    help = "Registers users from a JSON Lines or CSV file (username, email, password)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help='File to import, "-" reads stdin.')
+        parser.add_argument(
+            "--format",
+            choices=["jsonl", "csv"],
+            help="Defaults to csv for .csv files and jsonl otherwise.",
+        )
+        parser.add_argument("--chunk-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        format = options["format"] or ("csv" if path.endswith(".csv") else "jsonl")
+
+        if path == "-":
+            report = bulk.register_users(
+                bulk.read_rows(sys.stdin, format), options["chunk_size"]
+            )
+        else:
+            with open(
+                path, newline="", encoding="utf-8", errors="surrogateescape"
+            ) as lines:
+                report = bulk.register_users(
+                    bulk.read_rows(lines, format), options["chunk_size"]
+                )
+
+        for error in report["errors"]:
+            self.stderr.write(json.dumps(error))
+        created, failed = report["created"], len(report["errors"])
+        self.stdout.write(
+            self.style.SUCCESS(f"Created {created} users, {failed} rows failed.")
+        )
@@ -0,0 +1,28 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from users.codes import issue_referral_codes
+
+
+class Command(BaseCommand):
+    help = "Issues referral codes to users that don't have one."
+
+    def add_arguments(self, parser):
+        parser.add_argument("user_ids", nargs="*", type=int)
+        parser.add_argument(
+            "--all", action="store_true", help="Issue codes to every user."
+        )
+        parser.add_argument("--days", type=int, default=30)
+        parser.add_argument("--chunk-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        if not options["all"] and not options["user_ids"]:
+            raise CommandError("Pass user ids or --all.")
+
+        users = User.objects.all()
+        if not options["all"]:
+            users = users.filter(id__in=options["user_ids"])
+        expiration_date = timezone.now() + timezone.timedelta(days=options["days"])
+        issued = issue_referral_codes(users, expiration_date, options["chunk_size"])
+        self.stdout.write(self.style.SUCCESS(f"Issued {issued} referral codes."))
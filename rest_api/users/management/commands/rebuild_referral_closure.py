@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from users.network import rebuild_closure
+
+
+class Command(BaseCommand):
+    help = (
+        "Refills the ReferralClosure table from the Referral table, "
+        "e.g. after turning on REFERRAL_CLOSURE_TABLE."
+    )
+
+    def handle(self, *args, **options):
+        rows = rebuild_closure()
+        self.stdout.write(
+            self.style.SUCCESS(f"Rebuilt the referral closure with {rows} rows.")
+        )
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from users.counters import reconcile_referral_counts
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuilds every user's referral count from the Referral table, "
+        "e.g. after referrals were bulk-created or deleted without signals."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        referrers = reconcile_referral_counts(options["batch_size"])
+        self.stdout.write(
+            self.style.SUCCESS(f"Reconciled referral counts of {referrers} users.")
+        )
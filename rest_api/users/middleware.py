@@ -0,0 +1,25 @@
+import logging
+
+from django.utils.deprecation import MiddlewareMixin
+
+logger = logging.getLogger(__name__)
+
+
+class AuthenticationTimingMiddleware(MiddlewareMixin):
+    """
+    Reports the time DRF spent authenticating the request
+    (collected by ProfileAuthentication) in a Server-Timing header.
+    """
+
+    def process_request(self, request):
+        request.authentication_time = 0.0
+
+    def process_response(self, request, response):
+        duration = getattr(request, "authentication_time", 0.0) * 1000
+        if duration:
+            timing = f"auth;dur={duration:.3f}"
+            if response.has_header("Server-Timing"):
+                timing = f"{response['Server-Timing']}, {timing}"
+            response["Server-Timing"] = timing
+            logger.debug("%s %s auth %.3fms", request.method, request.path, duration)
+        return response
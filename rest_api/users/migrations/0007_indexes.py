@@ -0,0 +1,43 @@
+# Generated by Django 4.2.5 on 2026-10-18 13:21
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models.functions import Lower
+
+# auth_user belongs to django.contrib.auth, so its index is created by hand
+USER_EMAIL_INDEX = models.Index(Lower("email"), name="users_auth_user_email_lower")
+
+
+def add_user_email_index(apps, schema_editor):
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+    schema_editor.add_index(User, USER_EMAIL_INDEX)
+
+
+def remove_user_email_index(apps, schema_editor):
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+    schema_editor.remove_index(User, USER_EMAIL_INDEX)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("users", "0006_referral"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="referral",
+            index=models.Index(
+                fields=["referrer", "created_at", "id"],
+                name="users_referral_referrer_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="referralcode",
+            index=models.Index(
+                fields=["expiration_date"], name="users_refcode_expiration_idx"
+            ),
+        ),
+        migrations.RunPython(add_user_email_index, remove_user_email_index),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.5 on 2026-10-18 13:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0007_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="arcticle",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 4.2.5 on 2026-10-18 13:39
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+import django.db.models.deletion
+
+
+def count_referrals(apps, schema_editor):
+    Referral = apps.get_model("users", "Referral")
+    ReferralCounter = apps.get_model("users", "ReferralCounter")
+    counts = Referral.objects.values_list("referrer").annotate(count=Count("id"))
+    ReferralCounter.objects.bulk_create(
+        (ReferralCounter(user_id=user_id, count=count) for user_id, count in counts),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("users", "0008_arcticle_updated_at"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ReferralCounter",
+            fields=[
+                (
+                    "user",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="referral_counter",
+                        serialize=False,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                ("count", models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["-count", "user"], name="users_refcounter_rank_idx"
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(count_referrals, migrations.RunPython.noop),
+    ]
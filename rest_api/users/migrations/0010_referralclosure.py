@@ -0,0 +1,65 @@
+# Generated by Django 4.2.5 on 2026-10-18 13:42
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("users", "0009_referralcounter"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ReferralClosure",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("depth", models.PositiveIntegerField()),
+                (
+                    "ancestor",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                (
+                    "descendant",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["ancestor", "depth", "descendant"],
+                        name="users_refclosure_down_idx",
+                    ),
+                    models.Index(
+                        fields=["descendant", "depth", "ancestor"],
+                        name="users_refclosure_up_idx",
+                    ),
+                ],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="referralclosure",
+            constraint=models.UniqueConstraint(
+                fields=("ancestor", "descendant"), name="users_refclosure_pair"
+            ),
+        ),
+    ]
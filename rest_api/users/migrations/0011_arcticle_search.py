@@ -0,0 +1,106 @@
+# Generated by Django 4.2.5 on 2026-10-18 13:47
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+# SQLite: an external-content FTS5 table over users_arcticle, synced by
+# triggers. Title matches weigh ten times as much as content matches.
+SQLITE_CREATE = [
+    """
+    CREATE VIRTUAL TABLE users_arcticle_fts USING fts5(
+        title, content, content='users_arcticle', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )
+    """,
+    "INSERT INTO users_arcticle_fts(users_arcticle_fts, rank) "
+    "VALUES ('rank', 'bm25(10.0, 1.0)')",
+    """
+    CREATE TRIGGER users_arcticle_fts_insert AFTER INSERT ON users_arcticle BEGIN
+        INSERT INTO users_arcticle_fts(rowid, title, content)
+        VALUES (new.id, new.title, new.content);
+    END
+    """,
+    """
+    CREATE TRIGGER users_arcticle_fts_delete AFTER DELETE ON users_arcticle BEGIN
+        INSERT INTO users_arcticle_fts(users_arcticle_fts, rowid, title, content)
+        VALUES ('delete', old.id, old.title, old.content);
+    END
+    """,
+    """
+    CREATE TRIGGER users_arcticle_fts_update
+    AFTER UPDATE OF title, content ON users_arcticle BEGIN
+        INSERT INTO users_arcticle_fts(users_arcticle_fts, rowid, title, content)
+        VALUES ('delete', old.id, old.title, old.content);
+        INSERT INTO users_arcticle_fts(rowid, title, content)
+        VALUES (new.id, new.title, new.content);
+    END
+    """,
+    "INSERT INTO users_arcticle_fts(users_arcticle_fts) VALUES ('rebuild')",
+]
+SQLITE_DROP = [
+    "DROP TRIGGER users_arcticle_fts_insert",
+    "DROP TRIGGER users_arcticle_fts_delete",
+    "DROP TRIGGER users_arcticle_fts_update",
+    "DROP TABLE users_arcticle_fts",
+]
+
+# PostgreSQL: a generated tsvector column with a GIN index
+POSTGRESQL_CREATE = [
+    """
+    ALTER TABLE users_arcticle ADD COLUMN search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(title, '')), 'A')
+        || setweight(to_tsvector('english', coalesce(content, '')), 'B')
+    ) STORED
+    """,
+    "CREATE INDEX users_arcticle_search_idx ON users_arcticle "
+    "USING gin (search_vector)",
+]
+POSTGRESQL_DROP = ["ALTER TABLE users_arcticle DROP COLUMN search_vector"]
+
+
+def run(statements):
+    def operation(apps, schema_editor):
+        for statement in statements.get(schema_editor.connection.vendor, ()):
+            schema_editor.execute(statement)
+
+    return operation
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0010_referralclosure"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ArcticleSearch",
+            fields=[
+                (
+                    "arcticle",
+                    models.OneToOneField(
+                        db_column="rowid",
+                        db_constraint=False,
+                        on_delete=django.db.models.deletion.DO_NOTHING,
+                        primary_key=True,
+                        related_name="search",
+                        serialize=False,
+                        to="users.arcticle",
+                    ),
+                ),
+                ("title", models.TextField()),
+                ("content", models.TextField()),
+                ("document", models.TextField(db_column="users_arcticle_fts")),
+                ("rank", models.FloatField()),
+            ],
+            options={
+                "db_table": "users_arcticle_fts",
+                "managed": False,
+            },
+        ),
+        migrations.RunPython(
+            run({"sqlite": SQLITE_CREATE, "postgresql": POSTGRESQL_CREATE}),
+            run({"sqlite": SQLITE_DROP, "postgresql": POSTGRESQL_DROP}),
+        ),
+    ]
@@ -1,22 +1,72 @@
 from django.db import models
+from django.db.models.functions import Lower
 from django.contrib.auth.models import User
 from django.utils import timezone
 
 
+def filter_by_email(queryset, email, field="email"):
+    """Case-insensitive email match, served by the LOWER(email) index on auth_user."""
+    return queryset.alias(email_lower=Lower(field)).filter(email_lower=email.lower())
+
+
 class Arcticle(models.Model):
     title = models.CharField(max_length=200)
     content = models.TextField()
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return self.title
 
 
+class ArcticleSearch(models.Model):
+    """
+    The SQLite full-text index of Arcticle, an FTS5 table that triggers keep
+    in step with users_arcticle. Only queried through users.search.
+    """
+
+    arcticle = models.OneToOneField(
+        Arcticle,
+        primary_key=True,
+        db_column="rowid",
+        db_constraint=False,
+        related_name="search",
+        on_delete=models.DO_NOTHING,
+    )
+    title = models.TextField()
+    content = models.TextField()
+    # FTS5's hidden columns: the one named like the table takes MATCH and
+    # snippet(), rank is bm25() with the weights set by the migration
+    document = models.TextField(db_column="users_arcticle_fts")
+    rank = models.FloatField()
+
+    class Meta:
+        managed = False
+        db_table = "users_arcticle_fts"
+
+
+class ReferralCodeQuerySet(models.QuerySet):
+    def active(self, now=None):
+        return self.filter(expiration_date__gt=now or timezone.now())
+
+    def expired(self, now=None):
+        return self.filter(expiration_date__lte=now or timezone.now())
+
+
 class ReferralCode(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE)
     code = models.CharField(max_length=20, unique=True)
     expiration_date = models.DateTimeField()
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = ReferralCodeQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["expiration_date"], name="users_refcode_expiration_idx"
+            )
+        ]
+
     def is_active(self):
         return self.expiration_date > timezone.now()
 
@@ -29,3 +79,62 @@ class Referral(models.Model):
         User, related_name="referred_by", on_delete=models.CASCADE
     )
     created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # ReferralListView filters by referrer and orders by (created_at, id)
+            models.Index(
+                fields=["referrer", "created_at", "id"],
+                name="users_referral_referrer_idx",
+            )
+        ]
+
+
+class ReferralCounter(models.Model):
+    """
+    Number of referrals made by `user`, kept in step with Referral rows by
+    users.counters. `manage.py reconcile_referral_counts` rebuilds it.
+    """
+
+    user = models.OneToOneField(
+        User,
+        primary_key=True,
+        related_name="referral_counter",
+        on_delete=models.CASCADE,
+    )
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            # The leaderboard reads the top of (count desc, user)
+            models.Index(fields=["-count", "user"], name="users_refcounter_rank_idx")
+        ]
+
+
+class ReferralClosure(models.Model):
+    """
+    Every (ancestor, descendant) pair of the referral tree with the number of
+    referrals between them. Only maintained when REFERRAL_CLOSURE_TABLE is on,
+    see users.network.
+    """
+
+    ancestor = models.ForeignKey(User, related_name="+", on_delete=models.CASCADE)
+    descendant = models.ForeignKey(User, related_name="+", on_delete=models.CASCADE)
+    depth = models.PositiveIntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["ancestor", "descendant"], name="users_refclosure_pair"
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=["ancestor", "depth", "descendant"],
+                name="users_refclosure_down_idx",
+            ),
+            models.Index(
+                fields=["descendant", "depth", "ancestor"],
+                name="users_refclosure_up_idx",
+            ),
+        ]
@@ -0,0 +1,220 @@
+"""
+Multi-level referral queries.
+
+A user's downline (the people they referred, the people those referred, and
+so on) is read with one recursive CTE, on SQLite and PostgreSQL alike. Each
+user is referred at most once, so the only cycle a downline can contain runs
+back through its root, and the CTE stops there.
+
+With REFERRAL_CLOSURE_TABLE on, ReferralClosure stores every
+(ancestor, descendant, depth) triple. It is kept up to date as referrals are
+created and deleted, and the same queries then become plain index lookups.
+After turning it on, fill it with `manage.py rebuild_referral_closure`.
+"""
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import connections, router, transaction
+from django.db.models import Count, Q
+
+from .models import Referral, ReferralClosure
+
+
+def _names(connection):
+    quote = connection.ops.quote_name
+    return {
+        "referral": quote(Referral._meta.db_table),
+        "referrer": quote(Referral._meta.get_field("referrer").column),
+        "referee": quote(Referral._meta.get_field("referee").column),
+        "user": quote(User._meta.db_table),
+        "user_id": quote(User._meta.pk.column),
+        "username": quote(User._meta.get_field("username").column),
+        "closure": quote(ReferralClosure._meta.db_table),
+        "ancestor": quote(ReferralClosure._meta.get_field("ancestor").column),
+        "descendant": quote(ReferralClosure._meta.get_field("descendant").column),
+        "depth": quote("depth"),
+    }
+
+
+def _downline_cte(names, max_depth):
+    depth_limit = "AND d.depth < %s" if max_depth is not None else ""
+    return f"""
+        WITH RECURSIVE downline (user_id, referrer_id, depth) AS (
+            SELECT {names["referee"]}, {names["referrer"]}, 1
+            FROM {names["referral"]}
+            WHERE {names["referrer"]} = %s
+            UNION ALL
+            SELECT r.{names["referee"]}, r.{names["referrer"]}, d.depth + 1
+            FROM {names["referral"]} r
+            JOIN downline d ON r.{names["referrer"]} = d.user_id
+            WHERE r.{names["referee"]} <> %s {depth_limit}
+        )
+    """
+
+
+def _cte_params(user_id, max_depth):
+    return [user_id, user_id] + ([max_depth] if max_depth is not None else [])
+
+
+def use_closure():
+    return settings.REFERRAL_CLOSURE_TABLE
+
+
+def downline(user_id, max_depth=None, limit=None, offset=0):
+    """
+    Returns the users below `user_id`, down to `max_depth` levels, as dicts of
+    id, username, referrer and depth, ordered by depth and id.
+    """
+    if use_closure():
+        rows = ReferralClosure.objects.filter(ancestor_id=user_id)
+        if max_depth is not None:
+            rows = rows.filter(depth__lte=max_depth)
+        rows = rows.order_by("depth", "descendant").values_list(
+            "descendant",
+            "descendant__username",
+            "descendant__referred_by__referrer",
+            "depth",
+        )
+        stop = None if limit is None else offset + limit
+        return [
+            {"id": id, "username": username, "referrer": referrer, "depth": depth}
+            for id, username, referrer, depth in rows[offset:stop]
+        ]
+
+    connection = connections[router.db_for_read(Referral)]
+    names = _names(connection)
+    sql = _downline_cte(names, max_depth) + f"""
+        SELECT d.user_id, u.{names["username"]}, d.referrer_id, d.depth
+        FROM downline d
+        JOIN {names["user"]} u ON u.{names["user_id"]} = d.user_id
+        ORDER BY d.depth, d.user_id
+    """
+    params = _cte_params(user_id, max_depth)
+    if limit is not None:
+        sql += " LIMIT %s OFFSET %s"
+        params += [limit, offset]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [
+            {"id": id, "username": username, "referrer": referrer, "depth": depth}
+            for id, username, referrer, depth in cursor.fetchall()
+        ]
+
+
+def network_levels(user_id, max_depth=None):
+    """Returns the number of users on each level below `user_id`, from level 1."""
+    if use_closure():
+        rows = ReferralClosure.objects.filter(ancestor_id=user_id)
+        if max_depth is not None:
+            rows = rows.filter(depth__lte=max_depth)
+        rows = rows.values_list("depth").annotate(size=Count("id")).order_by("depth")
+        return [size for _, size in rows]
+
+    connection = connections[router.db_for_read(Referral)]
+    sql = _downline_cte(_names(connection), max_depth) + """
+        SELECT depth, COUNT(*) FROM downline GROUP BY depth ORDER BY depth
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(sql, _cte_params(user_id, max_depth))
+        return [size for _, size in cursor.fetchall()]
+
+
+class Downline:
+    """
+    Lazy downline that LimitOffsetPagination can count and slice; each page
+    is one query with LIMIT/OFFSET.
+    """
+
+    def __init__(self, user_id, max_depth=None):
+        self.user_id = user_id
+        self.max_depth = max_depth
+
+    def count(self):
+        return sum(network_levels(self.user_id, self.max_depth))
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice) or index.step is not None:
+            raise TypeError("Downline only supports slicing.")
+        offset = index.start or 0
+        limit = None if index.stop is None else max(index.stop - offset, 0)
+        return downline(self.user_id, self.max_depth, limit, offset)
+
+    def __iter__(self):
+        return iter(self[:])
+
+
+def link(referrer_id, referee_id):
+    """Adds the closure rows for a new referrer -> referee edge."""
+    closure = ReferralClosure.objects
+    if (
+        referrer_id == referee_id
+        or closure.filter(ancestor_id=referee_id, descendant_id=referrer_id).exists()
+    ):
+        # The edge closes a cycle, which has no closure
+        return
+    connection = connections[router.db_for_write(ReferralClosure)]
+    names = _names(connection)
+    # Every ancestor of the referrer (and the referrer) gets every descendant
+    # of the referee (and the referee)
+    sql = f"""
+        INSERT INTO {names["closure"]} ({names["ancestor"]}, {names["descendant"]}, {names["depth"]})
+        SELECT a.ancestor_id, d.descendant_id, a.depth + d.depth + 1
+        FROM (
+            SELECT {names["ancestor"]} AS ancestor_id, {names["depth"]} AS depth
+            FROM {names["closure"]} WHERE {names["descendant"]} = %s
+            UNION ALL SELECT %s, 0
+        ) a
+        CROSS JOIN (
+            SELECT {names["descendant"]} AS descendant_id, {names["depth"]} AS depth
+            FROM {names["closure"]} WHERE {names["ancestor"]} = %s
+            UNION ALL SELECT %s, 0
+        ) d
+    """  # noqa: E501
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [referrer_id, referrer_id, referee_id, referee_id])
+
+
+def unlink(referrer_id, referee_id):
+    """
+    Removes the closure rows that ran through a deleted referrer -> referee
+    edge. Call it before the Referral is deleted: deleting a user cascades to
+    the referrals on both sides of them, and the rows that connect those
+    have to still be there to be found.
+    """
+    closure = ReferralClosure.objects
+    if not closure.filter(
+        ancestor_id=referrer_id, descendant_id=referee_id, depth=1
+    ).exists():
+        # An edge link() skipped because it closed a cycle
+        return
+    ancestors = Q(ancestor_id=referrer_id) | Q(
+        ancestor_id__in=closure.filter(descendant_id=referrer_id).values("ancestor_id")
+    )
+    descendants = Q(descendant_id=referee_id) | Q(
+        descendant_id__in=closure.filter(ancestor_id=referee_id).values("descendant_id")
+    )
+    closure.filter(ancestors & descendants).delete()
+
+
+@transaction.atomic
+def rebuild_closure():
+    """Refills ReferralClosure from the Referral table. Returns the row count."""
+    ReferralClosure.objects.all().delete()
+    connection = connections[router.db_for_write(ReferralClosure)]
+    names = _names(connection)
+    sql = f"""
+        WITH RECURSIVE pairs (ancestor_id, descendant_id, depth) AS (
+            SELECT {names["referrer"]}, {names["referee"]}, 1
+            FROM {names["referral"]}
+            UNION ALL
+            SELECT p.ancestor_id, r.{names["referee"]}, p.depth + 1
+            FROM pairs p
+            JOIN {names["referral"]} r ON r.{names["referrer"]} = p.descendant_id
+            WHERE r.{names["referee"]} <> p.ancestor_id
+        )
+        INSERT INTO {names["closure"]} ({names["ancestor"]}, {names["descendant"]}, {names["depth"]})
+        SELECT ancestor_id, descendant_id, depth FROM pairs
+    """  # noqa: E501
+    with connection.cursor() as cursor:
+        cursor.execute(sql)
+        return cursor.rowcount
@@ -0,0 +1,81 @@
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import CursorPagination, LimitOffsetPagination
+
+
+class IdCursorPagination(CursorPagination):
+    """Keyset pagination over the primary key, deep pages cost the same as the first one."""
+
+    ordering = "id"
+    page_size_query_param = "limit"
+
+
+class LimitOffsetOrCursorPagination(LimitOffsetPagination):
+    """
+    Limit/offset pagination by default, switches to keyset pagination
+    when the client asks for it with `?pagination=cursor`. Keyset pages are
+    ordered by the cursor's fields, so querysets ordered otherwise (search
+    results by rank) are refused rather than silently reordered.
+    """
+
+    mode_query_param = "pagination"
+    cursor_mode = "cursor"
+    cursor_pagination_class = IdCursorPagination
+
+    cursor_paginator = None
+
+    def use_cursor(self, request):
+        return (
+            request.query_params.get(self.mode_query_param) == self.cursor_mode
+            or self.cursor_pagination_class.cursor_query_param in request.query_params
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.use_cursor(request):
+            self.cursor_paginator = self.cursor_pagination_class()
+            ordering = self.cursor_paginator.get_ordering(request, queryset, view)
+            if queryset.query.order_by and (
+                tuple(queryset.query.order_by) != tuple(ordering)
+            ):
+                raise ValidationError(
+                    {
+                        self.mode_query_param: [
+                            "Cursor pagination can't keep this ordering, "
+                            "use limit/offset pagination."
+                        ]
+                    }
+                )
+            return self.cursor_paginator.paginate_queryset(queryset, request, view)
+        self.cursor_paginator = None
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+    def to_html(self):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.to_html()
+        return super().to_html()
+
+    def get_schema_operation_parameters(self, view):
+        parameters = super().get_schema_operation_parameters(view)
+        parameters.append(
+            {
+                "name": self.mode_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Set to `cursor` to use keyset pagination.",
+                "schema": {"type": "string", "enum": [self.cursor_mode]},
+            }
+        )
+        parameters.append(
+            {
+                "name": self.cursor_pagination_class.cursor_query_param,
+                "required": False,
+                "in": "query",
+                "description": self.cursor_pagination_class.cursor_query_description,
+                "schema": {"type": "string"},
+            }
+        )
+        return parameters
@@ -0,0 +1,95 @@
+"""
+Password hashing off the request thread.
+
+Async views hash and verify passwords in a bounded process pool
+(PASSWORD_HASHING_WORKERS processes, or the event loop's default thread
+pool when it's 0), so a burst of logins doesn't starve other endpoints.
+"""
+
+import asyncio
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.conf import settings
+from django.contrib.auth.hashers import (
+    UNUSABLE_PASSWORD_PREFIX,
+    get_hasher,
+    identify_hasher,
+    make_password,
+)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor
+    workers = getattr(settings, "PASSWORD_HASHING_WORKERS", 0)
+    if not workers:
+        return None
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=django.setup,
+            )
+    return _executor
+
+
+def verify_password(password, encoded):
+    """
+    Same checks as django.contrib.auth.hashers.check_password, but returns
+    `(is_correct, must_update)` instead of calling a setter so it can run in a worker.
+    """
+    if (
+        password is None
+        or encoded is None
+        or encoded.startswith(UNUSABLE_PASSWORD_PREFIX)
+    ):
+        return False, False
+    try:
+        hasher = identify_hasher(encoded)
+    except ValueError:
+        return False, False
+
+    preferred = get_hasher("default")
+    hasher_changed = hasher.algorithm != preferred.algorithm
+    must_update = hasher_changed or preferred.must_update(encoded)
+    is_correct = hasher.verify(password, encoded)
+
+    # Keep the runtime of wrong passwords close to the runtime of right ones
+    if not is_correct and not hasher_changed and must_update:
+        hasher.harden_runtime(password, encoded)
+    return is_correct, must_update
+
+
+def make_passwords(passwords):
+    """Hashes many passwords at once, in parallel when there is a worker pool."""
+    executor = get_executor()
+    if executor is None:
+        return [make_password(password) for password in passwords]
+    chunksize = max(len(passwords) // (settings.PASSWORD_HASHING_WORKERS * 4), 1)
+    return list(executor.map(make_password, passwords, chunksize=chunksize))
+
+
+async def run_in_pool(func, *args):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_executor(), func, *args)
+
+
+async def amake_password(password):
+    return await run_in_pool(make_password, password)
+
+
+async def acheck_password(user, password):
+    """Async User.check_password, re-hashes the password when the hasher settings changed."""
+    is_correct, must_update = await run_in_pool(
+        verify_password, password, user.password
+    )
+    if is_correct and must_update:
+        user.password = await amake_password(password)
+        await user.asave(update_fields=["password"])
+    return is_correct
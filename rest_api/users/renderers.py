@@ -0,0 +1,130 @@
+import csv
+import io
+
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils import encoders
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+_encoder = encoders.JSONEncoder()
+
+# Spreadsheets run cells starting with these as formulas
+FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+def _same_as_json(value):
+    """
+    False when `value` holds a float that orjson writes differently from the
+    stdlib: NaN and infinities, which orjson writes as null where JSONRenderer
+    raises, and floats that repr() writes with an exponent ("1e+20", "1e-05"),
+    which orjson writes as "1e20" and "0.00001".
+    """
+    stack = [value]
+    pop, extend = stack.pop, stack.extend
+    while stack:
+        value = pop()
+        kind = type(value)
+        if kind is str or kind is int or kind is bool or value is None:
+            continue
+        if kind is float:
+            if value and not 1e-4 <= abs(value) < 1e16:
+                return False
+        elif isinstance(value, dict):
+            extend(value.values())
+        elif isinstance(value, (list, tuple)):
+            extend(value)
+    return True
+
+
+def _default(obj):
+    value = _encoder.default(obj)
+    if not _same_as_json(value):
+        # orjson raises JSONEncodeError, and the stdlib renderer takes over
+        raise TypeError
+    return value
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer backed by orjson when it is installed. The output is the same
+    as JSONRenderer's compact output; indented or ASCII-only output, non-string
+    keys, floats that orjson writes differently, and anything orjson refuses,
+    go through the stdlib renderer.
+    """
+
+    if orjson is not None:
+        options = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            orjson is None
+            or data is None
+            or self.ensure_ascii
+            or not self.compact
+            or self.get_indent(accepted_media_type, renderer_context or {}) is not None
+            or not _same_as_json(data)
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            # Datetimes, Decimals and lazy strings are handed to DRF's encoder
+            # so they come out exactly as with JSONRenderer
+            ret = orjson.dumps(data, default=_default, option=self.options)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # Same escaping as JSONRenderer, to stay a strict javascript subset
+        if b"\xe2\x80\xa8" in ret or b"\xe2\x80\xa9" in ret:
+            ret = ret.replace(b"\xe2\x80\xa8", b"\\u2028")
+            ret = ret.replace(b"\xe2\x80\xa9", b"\\u2029")
+        return ret
+
+
+class NDJSONRenderer(FastJSONRenderer):
+    """
+    JSON Lines. Export views stream their rows themselves; this renders
+    their other responses, such as errors, as a single line.
+    """
+
+    media_type = "application/x-ndjson"
+    format = "jsonl"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        return super().render(data, None, renderer_context) + b"\n"
+
+
+def csv_cell(value):
+    """
+    Prefixes text a spreadsheet would run as a formula with "'", so it is
+    shown as text instead.
+    """
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+class CSVRenderer(BaseRenderer):
+    """
+    CSV counterpart of NDJSONRenderer, renders a response as `key,value` rows.
+    """
+
+    media_type = "text/csv"
+    format = "csv"
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        items = data.items() if isinstance(data, dict) else enumerate(data)
+        for key, value in items:
+            if isinstance(value, (list, tuple)):
+                value = " ".join(str(item) for item in value)
+            writer.writerow([csv_cell(key), csv_cell(value)])
+        return buffer.getvalue().encode(self.charset)
@@ -0,0 +1,145 @@
+import functools
+import hashlib
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from rest_framework import status
+from rest_framework.response import Response
+
+from rest_api import routers
+
+_MISSING = object()
+
+
+def get_response_cache():
+    return caches[settings.RESPONSE_CACHE["ALIAS"]]
+
+
+def generation_key(namespace, pk=None):
+    return f"response:{namespace}:generation:{'list' if pk is None else pk}"
+
+
+def new_generation():
+    # Random, so an evicted generation never comes back with the value that
+    # stale entries were stored under, and stamped with the time it was made
+    return f"{time.time():.6f}-{uuid.uuid4().hex}"
+
+
+def generation_age(generation):
+    """Seconds since `generation` was made, or None if it isn't known."""
+    stamp, _, token = generation.partition("-")
+    try:
+        return time.time() - float(stamp) if token else None
+    except ValueError:
+        return None
+
+
+def get_generation(cache, namespace, pk=None):
+    """
+    Cached entries are keyed by generation tokens. Bumping a token orphans
+    every entry built on it; the orphans expire with their timeout.
+    """
+    key = generation_key(namespace, pk)
+    generation = cache.get(key)
+    if generation is None:
+        cache.add(key, new_generation(), None)
+        generation = cache.get(key)
+    return generation
+
+
+def _bump(namespace, pk):
+    cache = get_response_cache()
+    cache.set_many(
+        {
+            generation_key(namespace): new_generation(),
+            generation_key(namespace, pk): new_generation(),
+        },
+        None,
+    )
+
+
+def invalidate(namespace, pk):
+    """
+    Drop the cached responses for one object and for the collection it is in.
+    Runs again on commit, so a read that raced the write inside a
+    transaction can't keep the old rows cached.
+    """
+    _bump(namespace, pk)
+    transaction.on_commit(lambda: _bump(namespace, pk))
+
+
+def get_scope(view, request):
+    # The permission classes decide who gets to see a response and staff
+    # may be allowed more, so both go into the key
+    permissions = ",".join(
+        type(permission).__name__ for permission in view.get_permissions()
+    )
+    if request.user.is_staff:
+        role = "staff"
+    elif request.user.is_authenticated:
+        role = "user"
+    else:
+        role = "anonymous"
+    return f"{permissions}:{role}"
+
+
+def cache_key(request, namespace, generation, scope):
+    query = sorted(request.query_params.lists())
+    # Responses hold absolute links (pagination, user urls) built from these
+    origin = f"{request.scheme}://{request.get_host()}"
+    raw = f"{origin}|{request.path}|{query}|{scope}|{generation}"
+    return f"response:{namespace}:{hashlib.sha256(raw.encode()).hexdigest()}"
+
+
+def cached_response(namespace):
+    """
+    Cache the data of successful responses from a viewset action.
+
+    When a hot key is missing, only the request that wins the lock rebuilds
+    it; the others wait up to RESPONSE_CACHE["WAIT"] seconds for the result
+    before giving up and computing it themselves. Within REPLICA_PIN_SECONDS
+    of an invalidation the rebuild reads from the primary, a lagging replica
+    could still return the old rows and they'd be cached for TIMEOUT.
+    """
+
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, request, *args, **kwargs):
+            options = settings.RESPONSE_CACHE
+            cache = get_response_cache()
+            generation = get_generation(cache, namespace, kwargs.get("pk"))
+            key = cache_key(request, namespace, generation, get_scope(self, request))
+
+            data = cache.get(key, _MISSING)
+            if data is not _MISSING:
+                return Response(data)
+
+            lock_key = f"{key}:lock"
+            if not cache.add(lock_key, 1, options["LOCK_TIMEOUT"]):
+                deadline = time.monotonic() + options["WAIT"]
+                while time.monotonic() < deadline:
+                    time.sleep(options["POLL_INTERVAL"])
+                    data = cache.get(key, _MISSING)
+                    if data is not _MISSING:
+                        return Response(data)
+                    if cache.get(lock_key) is None:
+                        break
+                return method(self, request, *args, **kwargs)
+
+            try:
+                age = generation_age(generation)
+                if age is None or age < settings.REPLICA_PIN_SECONDS:
+                    routers.use_primary()
+                response = method(self, request, *args, **kwargs)
+                if response.status_code == status.HTTP_200_OK:
+                    cache.set(key, response.data, options["TIMEOUT"])
+            finally:
+                cache.delete(lock_key)
+            return response
+
+        return wrapper
+
+    return decorator
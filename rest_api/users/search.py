@@ -0,0 +1,144 @@
+"""
+Full-text search over article titles and content.
+
+SQLite reads the FTS5 table users_arcticle_fts (see ArcticleSearch), and
+PostgreSQL the generated `search_vector` column of users_arcticle with its
+GIN index; both are created by migration 0011 and kept in step by the
+database itself. Matches are ranked with title hits first, and every search
+term matches as a prefix, so "pag" finds "pagination".
+
+Snippets are cut from the content on both databases. The text is
+HTML-escaped before the matches are wrapped in HIGHLIGHT, so the snippet can
+be inserted into a page as is.
+"""
+
+import re
+
+from django.db import connections
+from django.db.models import F, Func, Lookup, TextField, Value
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Replace
+
+from .models import Arcticle, ArcticleSearch
+
+SEARCH_CONFIG = "english"
+MAX_TERMS = 16
+HIGHLIGHT = ("<mark>", "</mark>")
+ELLIPSIS = "…"
+SNIPPET_WORDS = 24
+SNIPPET_COLUMN = "content"
+# Columns of users_arcticle_fts, in the order migration 0011 creates them
+FTS_COLUMNS = ("title", "content")
+# Put around matches by the database and swapped for HIGHLIGHT after
+# escaping; private use characters, so article text doesn't contain them
+MARKERS = ("\ue000", "\ue001")
+# Same as html.escape(), "&" first so the entities aren't escaped again
+HTML_ESCAPES = (
+    ("&", "&amp;"),
+    ("<", "&lt;"),
+    (">", "&gt;"),
+    ('"', "&quot;"),
+    ("'", "&#x27;"),
+)
+
+
+def search_terms(text):
+    """Splits user input into at most MAX_TERMS words, dropping any query syntax."""
+    return re.findall(r"\w+", text)[:MAX_TERMS]
+
+
+@ArcticleSearch._meta.get_field("document").register_lookup
+class Match(Lookup):
+    lookup_name = "match"
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f"{lhs} MATCH {rhs}", (*lhs_params, *rhs_params)
+
+
+class Snippet(Func):
+    function = "snippet"
+    output_field = TextField()
+
+
+def highlighted(snippet):
+    """HTML-escapes the `snippet` expression, then turns MARKERS into HIGHLIGHT."""
+    for old, new in (*HTML_ESCAPES, *zip(MARKERS, HIGHLIGHT)):
+        snippet = Replace(snippet, Value(old), Value(new), output_field=TextField())
+    return snippet
+
+
+def search_arcticles(queryset, text, snippets=False):
+    """
+    Filters `queryset` to the articles matching every term of `text`, best
+    match first. With `snippets` each article gets a `snippet` of the text
+    around its matches, with the matches wrapped in HIGHLIGHT.
+    """
+    terms = search_terms(text)
+    if not terms:
+        return queryset.none()
+    if connections[queryset.db].vendor == "postgresql":
+        return _search_postgresql(queryset, terms, snippets)
+    return _search_sqlite(queryset, terms, snippets)
+
+
+def _search_sqlite(queryset, terms, snippets):
+    query = " ".join('"%s"*' % term for term in terms)
+    queryset = queryset.filter(search__document__match=query)
+    if snippets:
+        queryset = queryset.annotate(
+            snippet=highlighted(
+                Snippet(
+                    F("search__document"),
+                    Value(FTS_COLUMNS.index(SNIPPET_COLUMN)),
+                    *(Value(marker) for marker in MARKERS),
+                    Value(ELLIPSIS),
+                    Value(SNIPPET_WORDS),
+                )
+            )
+        )
+    # bm25() is negative, the best match has the lowest rank
+    return queryset.order_by("search__rank", "id")
+
+
+def _search_postgresql(queryset, terms, snippets):
+    from django.contrib.postgres.search import (
+        SearchHeadline,
+        SearchQuery,
+        SearchRank,
+        SearchVectorField,
+    )
+
+    query = SearchQuery(
+        " & ".join(f"{term}:*" for term in terms),
+        search_type="raw",
+        config=SEARCH_CONFIG,
+    )
+    vector = RawSQL(
+        f"{Arcticle._meta.db_table}.search_vector",
+        (),
+        output_field=SearchVectorField(),
+    )
+    queryset = (
+        queryset.alias(search_vector=vector, rank=SearchRank(vector, query))
+        .filter(search_vector=query)
+        .order_by("-rank", "id")
+    )
+    if snippets:
+        queryset = queryset.annotate(
+            snippet=highlighted(
+                SearchHeadline(
+                    SNIPPET_COLUMN,
+                    query,
+                    config=SEARCH_CONFIG,
+                    start_sel=MARKERS[0],
+                    stop_sel=MARKERS[1],
+                    fragment_delimiter=f" {ELLIPSIS} ",
+                    max_fragments=1,
+                    max_words=SNIPPET_WORDS,
+                    min_words=SNIPPET_WORDS // 2,
+                )
+            )
+        )
+    return queryset
@@ -1,9 +1,45 @@
-from rest_framework import serializers
-from .models import Arcticle, ReferralCode, Referral
+from django.conf import settings
+from rest_framework import permissions, serializers
+from .models import Arcticle, ReferralCode, Referral, ReferralCounter, filter_by_email
 from django.contrib.auth.models import User
+from django.contrib.auth.validators import UnicodeUsernameValidator
+
+
+class TemplatedHyperlinkedIdentityField(serializers.HyperlinkedIdentityField):
+    """
+    Reverses the route once per request with a placeholder id, then formats
+    integer ids into that URL instead of calling reverse() for every object.
+    """
+
+    placeholder = 7093154122
+
+    def get_url(self, obj, view_name, request, format):
+        lookup_value = getattr(obj, self.lookup_field, None)
+        if request is None or type(lookup_value) is not int or lookup_value < 0:
+            return super().get_url(obj, view_name, request, format)
+
+        templates = getattr(request, "_url_templates", None)
+        if templates is None:
+            templates = request._url_templates = {}
+        key = (view_name, format, self.lookup_url_kwarg)
+        if key not in templates:
+            url = self.reverse(
+                view_name,
+                kwargs={self.lookup_url_kwarg: self.placeholder},
+                request=request,
+                format=format,
+            )
+            parts = url.split(str(self.placeholder))
+            templates[key] = parts if len(parts) == 2 else None
+        if templates[key] is None:
+            return super().get_url(obj, view_name, request, format)
+        prefix, suffix = templates[key]
+        return f"{prefix}{lookup_value}{suffix}"
 
 
 class UserSerializer(serializers.ModelSerializer):
+    serializer_url_field = TemplatedHyperlinkedIdentityField
+
     class Meta:
         model = User
         fields = ["url", "username", "email", "is_staff"]
@@ -17,7 +53,7 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
         fields = ["username", "email", "password"]
 
     def validate_email(self, value):
-        if value and User.objects.filter(email=value).exists():
+        if value and filter_by_email(User.objects.all(), value).exists():
             raise serializers.ValidationError("A user with that email already exists.")
         return value
 
@@ -31,10 +67,22 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
         return user
 
 
-class UserLoginSerializer(serializers.Serializer):
+class BulkUserRegistrationSerializer(UserRegistrationSerializer):
+    """Row validation for bulk imports, users.bulk checks uniqueness per chunk."""
+
+    class Meta(UserRegistrationSerializer.Meta):
+        extra_kwargs = {"username": {"validators": [UnicodeUsernameValidator()]}}
+
+    def validate_email(self, value):
+        return value
+
+
+class LoginCredentialsSerializer(serializers.Serializer):
     username = serializers.CharField()
     password = serializers.CharField(write_only=True)
 
+
+class UserLoginSerializer(LoginCredentialsSerializer):
     def validate(self, data):
         username = data.get("username")
         password = data.get("password")
@@ -49,7 +97,39 @@ class UserLoginSerializer(serializers.Serializer):
             raise serializers.ValidationError('Must include "username" and "password"')
 
 
-class ArcticleSerializer(serializers.ModelSerializer):
+class SparseFieldsetMixin:
+    """
+    Lets clients pick the fields they need with `?fields=id,title`.
+    Without the parameter, or when it names no known field,
+    `Meta.default_fields` (or every field) is returned. Writes always use
+    every field.
+    """
+
+    fields_query_param = "fields"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        requested = self.requested_fields(self.context.get("request"))
+        if requested is not None:
+            for name in set(self.fields) - requested:
+                self.fields.pop(name)
+
+    @classmethod
+    def requested_fields(cls, request):
+        default = getattr(cls.Meta, "default_fields", None)
+        default = set(default) if default is not None else None
+        if request is None:
+            return default
+        if request.method not in permissions.SAFE_METHODS:
+            return None
+        value = request.query_params.get(cls.fields_query_param)
+        if not value:
+            return default
+        requested = {name.strip() for name in value.split(",")}
+        return requested & set(cls.Meta.fields) or default
+
+
+class ArcticleSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     id = serializers.IntegerField(read_only=True)
 
     class Meta:
@@ -57,6 +137,17 @@ class ArcticleSerializer(serializers.ModelSerializer):
         fields = ["id", "title", "content"]
 
 
+class ArcticleListSerializer(ArcticleSerializer):
+    # Annotated by ArcticleViewSet so the full content column is never loaded
+    excerpt = serializers.CharField(read_only=True)
+    # Annotated by ArcticleFilter when searching with ?q=
+    snippet = serializers.CharField(read_only=True, default=None)
+
+    class Meta(ArcticleSerializer.Meta):
+        fields = ["id", "title", "excerpt", "snippet", "content"]
+        default_fields = ["id", "title"]
+
+
 class ReferralCodeSerializer(serializers.ModelSerializer):
     class Meta:
         model = ReferralCode
@@ -72,6 +163,17 @@ class ReferralCodeSerializer(serializers.ModelSerializer):
         return attrs
 
 
+class ReferralCodeBatchSerializer(serializers.Serializer):
+    user_ids = serializers.ListField(child=serializers.IntegerField(), required=False)
+    all_users = serializers.BooleanField(default=False)
+    days = serializers.IntegerField(default=30, min_value=1)
+
+    def validate(self, attrs):
+        if not attrs["all_users"] and not attrs.get("user_ids"):
+            raise serializers.ValidationError('Must include "user_ids" or "all_users"')
+        return attrs
+
+
 class ReferralSerializer(serializers.ModelSerializer):
     referrer = UserSerializer()
     referee = UserSerializer()
@@ -79,3 +181,34 @@ class ReferralSerializer(serializers.ModelSerializer):
     class Meta:
         model = Referral
         fields = ["referrer", "referee", "created_at"]
+
+
+class ReferralLeaderboardSerializer(serializers.ModelSerializer):
+    id = serializers.IntegerField(source="user_id")
+    username = serializers.CharField(source="user.username")
+    referrals = serializers.IntegerField(source="count")
+
+    class Meta:
+        model = ReferralCounter
+        fields = ["id", "username", "referrals"]
+
+
+class ReferralDownlineSerializer(serializers.Serializer):
+    """A row of users.network.downline()."""
+
+    id = serializers.IntegerField()
+    username = serializers.CharField()
+    referrer = serializers.IntegerField()
+    depth = serializers.IntegerField()
+
+
+class ReferralDepthSerializer(serializers.Serializer):
+    depth = serializers.IntegerField(required=False, min_value=1)
+
+    def validate_depth(self, value):
+        max_depth = settings.REFERRAL_MAX_DEPTH
+        if value > max_depth:
+            raise serializers.ValidationError(
+                f"Ensure this value is less than or equal to {max_depth}."
+            )
+        return value
@@ -0,0 +1,56 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from rest_framework_simplejwt.settings import api_settings
+
+from django.core.cache import cache
+
+from .authentication import user_cache
+from .codes import referral_code_cache_key
+from .counters import add_referrals
+from .models import Arcticle, Referral, ReferralCode
+from .network import link, unlink
+from .response_cache import invalidate
+
+
+@receiver([post_save, post_delete], sender=settings.AUTH_USER_MODEL)
+def invalidate_cached_user(sender, instance, **kwargs):
+    user_cache.delete(getattr(instance, api_settings.USER_ID_FIELD))
+
+
+@receiver([post_save, post_delete], sender=ReferralCode)
+def invalidate_cached_referral_code(sender, instance, **kwargs):
+    key = referral_code_cache_key(instance.code)
+    cache.delete(key)
+    # Again on commit: a signup that read the row before the write committed
+    # may have cached it meanwhile, for every worker sharing the cache
+    transaction.on_commit(lambda: cache.delete(key))
+
+
+@receiver([post_save, post_delete], sender=Arcticle)
+def invalidate_cached_arcticle(sender, instance, **kwargs):
+    invalidate("arcticles", instance.pk)
+
+
+@receiver(post_save, sender=Referral)
+def count_referral(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        add_referrals(instance.referrer_id, 1)
+
+
+@receiver(post_delete, sender=Referral)
+def uncount_referral(sender, instance, **kwargs):
+    add_referrals(instance.referrer_id, -1)
+
+
+@receiver(post_save, sender=Referral)
+def link_referral(sender, instance, created, raw=False, **kwargs):
+    if created and not raw and settings.REFERRAL_CLOSURE_TABLE:
+        link(instance.referrer_id, instance.referee_id)
+
+
+@receiver(pre_delete, sender=Referral)
+def unlink_referral(sender, instance, **kwargs):
+    if settings.REFERRAL_CLOSURE_TABLE:
+        unlink(instance.referrer_id, instance.referee_id)
@@ -1,10 +1,20 @@
 from django.urls import reverse
 from rest_framework.test import APITestCase
-from rest_framework import status
+from rest_framework import serializers, status
 from users.models import Arcticle, ReferralCode
-from users.serializers import ArcticleSerializer, UserLoginSerializer
+from users.serializers import (
+    ArcticleListSerializer,
+    ArcticleSerializer,
+    UserLoginSerializer,
+)
 from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.test import override_settings
+import time
+from unittest import mock
 from django.utils import timezone
+from django.utils.http import http_date
 
 User = get_user_model()
 
@@ -106,6 +116,27 @@ class UserLoginSerializerTest(APITestCase):
         self.assertIn("password", serializer.errors)
         self.assertEqual(serializer.errors["password"][0], "This field is required.")
 
+    def test_valid_login_upgrades_password_hash(self):
+        self.user.password = make_password("password123", hasher="pbkdf2_sha256")
+        self.user.save()
+        data = {"username": "testuser", "password": "password123"}
+        serializer = UserLoginSerializer(data=data)
+        self.assertTrue(serializer.is_valid())
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith("scrypt$"))
+        self.assertTrue(self.user.check_password("password123"))
+
+    @override_settings(
+        PASSWORD_HASHERS=["users.hashers.TunedScryptPasswordHasher"],
+        PASSWORD_HASHER_OPTIONS={"scrypt": {"work_factor": 2**10}},
+    )
+    def test_valid_login_applies_tuned_hasher_options(self):
+        data = {"username": "testuser", "password": "password123"}
+        serializer = UserLoginSerializer(data=data)
+        self.assertTrue(serializer.is_valid())
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith("scrypt$1024$"))
+
 
 class ReferralCodeSerializerTest(APITestCase):
 
@@ -143,6 +174,7 @@ class ReferralCodeSerializerTest(APITestCase):
 
 class ArcticlesApiTestCase(APITestCase):
     def setUp(self):
+        cache.clear()
         self.user = User.objects.create_user(
             username="testuser", email="testuser@example.com", password="password123"
         )
@@ -159,6 +191,172 @@ class ArcticlesApiTestCase(APITestCase):
         )
         url = reverse("arcticle-list")
         response = self.client.get(url)
-        serialized_data = ArcticleSerializer([arcticle1, arcticle2], many=True).data
+        expected_data = [
+            {"id": arcticle1.id, "title": "Arcticle 1"},
+            {"id": arcticle2.id, "title": "Arcticle 2"},
+        ]
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual(response.data["results"], expected_data)
+
+    def test_list_skips_model_instances(self):
+        Arcticle.objects.create(title="Arcticle 1", content="Content 1")
+        with mock.patch.object(
+            serializers.Serializer, "to_representation", side_effect=AssertionError
+        ):
+            response = self.client.get(reverse("arcticle-list"))
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+
+    def test_list_honours_to_representation_overrides(self):
+        arcticle = Arcticle.objects.create(title="Arcticle 1", content="Content 1")
+
+        def to_representation(self, instance):
+            return {"id": instance.id, "overridden": True}
+
+        with mock.patch.object(
+            ArcticleListSerializer, "to_representation", to_representation
+        ):
+            response = self.client.get(reverse("arcticle-list"))
+        self.assertEqual(
+            response.data["results"], [{"id": arcticle.id, "overridden": True}]
+        )
+
+    def test_get_with_excerpt(self):
+        arcticle = Arcticle.objects.create(title="Arcticle 1", content="x" * 500)
+        url = reverse("arcticle-list")
+        response = self.client.get(url, {"fields": "id,excerpt"})
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual(
+            response.data["results"], [{"id": arcticle.id, "excerpt": "x" * 200}]
+        )
+
+    def test_get_with_content(self):
+        Arcticle.objects.create(title="Arcticle 1", content="Content 1")
+        url = reverse("arcticle-list")
+        response = self.client.get(url, {"fields": "title,content,unknown"})
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual(
+            response.data["results"],
+            [{"title": "Arcticle 1", "content": "Content 1"}],
+        )
+
+    def test_get_with_unknown_fields_only(self):
+        arcticle = Arcticle.objects.create(title="Arcticle 1", content="Content 1")
+        url = reverse("arcticle-list")
+        response = self.client.get(url, {"fields": "unknown,other"})
+        self.assertEqual(
+            response.data["results"], [{"id": arcticle.id, "title": "Arcticle 1"}]
+        )
+
+    def test_fields_param_is_ignored_on_writes(self):
+        arcticle = Arcticle.objects.create(title="Arcticle 1", content="Content 1")
+        url = reverse("arcticle-detail", args=[arcticle.id])
+        data = {"title": "Arcticle 2", "content": "Content 2"}
+        response = self.client.put(f"{url}?fields=title", data, format="json")
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual(response.data, {"id": arcticle.id, **data})
+        arcticle.refresh_from_db()
+        self.assertEqual(arcticle.content, "Content 2")
+
+    def test_retrieve_returns_content(self):
+        arcticle = Arcticle.objects.create(title="Arcticle 1", content="Content 1")
+        url = reverse("arcticle-detail", args=[arcticle.id])
+        response = self.client.get(url)
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual(response.data, ArcticleSerializer(arcticle).data)
+
+        response = self.client.get(url, {"fields": "title"})
+        self.assertEqual(response.data, {"title": "Arcticle 1"})
+
+    def test_get_with_cursor_pagination(self):
+        arcticles = [
+            Arcticle.objects.create(title=f"Arcticle {i}", content=f"Content {i}")
+            for i in range(3)
+        ]
+        url = reverse("arcticle-list")
+        response = self.client.get(url, {"pagination": "cursor", "limit": 2})
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertNotIn("count", response.data)
+        self.assertEqual(
+            [arcticle["id"] for arcticle in response.data["results"]],
+            [arcticle.id for arcticle in arcticles[:2]],
+        )
+        self.assertIsNone(response.data["previous"])
+
+        response = self.client.get(response.data["next"])
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual(
+            [arcticle["id"] for arcticle in response.data["results"]],
+            [arcticles[2].id],
+        )
+        self.assertIsNone(response.data["next"])
+
+    def test_retrieve_not_modified(self):
+        arcticle = Arcticle.objects.create(title="Arcticle 1", content="Content 1")
+        url = reverse("arcticle-detail", args=[arcticle.id])
+        response = self.client.get(url)
+        etag = response["ETag"]
+        self.assertTrue(response.has_header("Last-Modified"))
+
+        with self.assertNumQueries(1):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(status.HTTP_304_NOT_MODIFIED, response.status_code)
+
+        response = self.client.get(
+            url, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"]
+        )
+        self.assertEqual(status.HTTP_304_NOT_MODIFIED, response.status_code)
+
+        response = self.client.get(url, {"fields": "title"}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+
+        arcticle.title = "Arcticle 2"
+        arcticle.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_list_not_modified(self):
+        Arcticle.objects.create(title="Arcticle 1", content="Content 1")
+        url = reverse("arcticle-list")
+        etag = self.client.get(url)["ETag"]
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(status.HTTP_304_NOT_MODIFIED, response.status_code)
+
+        arcticle = Arcticle.objects.create(title="Arcticle 2", content="Content 2")
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        etag = response["ETag"]
+
+        arcticle.delete()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+
+    def test_list_modified_since_after_delete(self):
+        arcticle = Arcticle.objects.create(title="Arcticle 1", content="Content 1")
+        Arcticle.objects.create(title="Arcticle 2", content="Content 2")
+        url = reverse("arcticle-list")
+        response = self.client.get(url)
+        self.assertFalse(response.has_header("Last-Modified"))
+
+        arcticle.delete()
+        since = http_date(time.time() + 60)
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=since)
         self.assertEqual(status.HTTP_200_OK, response.status_code)
-        self.assertEqual(response.data["results"], serialized_data)
+        self.assertEqual(response.data["count"], 1)
+
+    def test_retrieve_invalid_id(self):
+        response = self.client.get(reverse("arcticle-detail", args=["abc"]))
+        self.assertEqual(status.HTTP_404_NOT_FOUND, response.status_code)
+
+    def test_list_not_modified_without_queries(self):
+        Arcticle.objects.create(title="Arcticle 1", content="Content 1")
+        url = reverse("arcticle-list")
+        etag = self.client.get(url)["ETag"]
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(status.HTTP_304_NOT_MODIFIED, response.status_code)
+
+    def test_retrieve_missing_has_no_etag(self):
+        response = self.client.get(reverse("arcticle-detail", args=[1]))
+        self.assertEqual(status.HTTP_404_NOT_FOUND, response.status_code)
+        self.assertFalse(response.has_header("ETag"))
@@ -0,0 +1,124 @@
+import base64
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from rest_framework import status
+from rest_framework.test import APIRequestFactory, APITestCase
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.tokens import AccessToken
+from users.authentication import CachedJWTAuthentication, user_cache
+from users.cache import TTLCache
+
+User = get_user_model()
+
+
+class TTLCacheTest(TestCase):
+
+    def setUp(self):
+        self.now = 0
+        self.cache = TTLCache(max_size=2, ttl=10, timer=lambda: self.now)
+
+    def test_get_and_set(self):
+        self.cache.set("a", 1)
+        self.assertEqual(self.cache.get("a"), 1)
+        self.assertIsNone(self.cache.get("b"))
+
+    def test_expired_entries_are_evicted(self):
+        self.cache.set("a", 1)
+        self.now = 10
+        self.assertIsNone(self.cache.get("a"))
+        self.assertEqual(len(self.cache), 0)
+
+    def test_least_recently_used_entry_is_evicted(self):
+        self.cache.set("a", 1)
+        self.cache.set("b", 2)
+        self.cache.get("a")
+        self.cache.set("c", 3)
+        self.assertEqual(self.cache.get("a"), 1)
+        self.assertIsNone(self.cache.get("b"))
+        self.assertEqual(self.cache.get("c"), 3)
+
+
+class CachedJWTAuthenticationTest(TestCase):
+
+    def setUp(self):
+        user_cache.clear()
+        self.user = User.objects.create_user(
+            username="testuser", email="testuser@example.com", password="password123"
+        )
+        self.authentication = CachedJWTAuthentication()
+        self.factory = APIRequestFactory()
+
+    def tearDown(self):
+        user_cache.clear()
+
+    def authenticate(self):
+        token = AccessToken.for_user(self.user)
+        request = self.factory.get("/", HTTP_AUTHORIZATION=f"Bearer {token}")
+        user, _ = self.authentication.authenticate(request)
+        return user
+
+    def test_user_is_loaded_once(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(self.authenticate(), self.user)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.authenticate(), self.user)
+
+    def test_cached_user_is_a_copy(self):
+        first = self.authenticate()
+        first.username = "changed"
+        self.assertEqual(self.authenticate().username, "testuser")
+
+    def test_save_invalidates_cache(self):
+        self.authenticate()
+        self.user.is_active = False
+        self.user.save()
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
+
+    def test_delete_invalidates_cache(self):
+        self.authenticate()
+        User.objects.get(id=self.user.id).delete()
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
+
+
+class ProfileAuthenticationTest(APITestCase):
+
+    def setUp(self):
+        user_cache.clear()
+        self.user = User.objects.create_user(
+            username="testuser", email="testuser@example.com", password="password123"
+        )
+        self.token = AccessToken.for_user(self.user)
+
+    def tearDown(self):
+        user_cache.clear()
+
+    def test_api_routes_accept_jwt(self):
+        response = self.client.get(
+            "/api/v1/arcticles/", HTTP_AUTHORIZATION=f"Bearer {self.token}"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response["Server-Timing"].startswith("auth;dur="))
+
+    def test_api_routes_reject_session(self):
+        self.client.login(username="testuser", password="password123")
+        response = self.client.get("/api/v1/arcticles/")
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_api_routes_reject_basic(self):
+        credentials = base64.b64encode(b"testuser:password123").decode()
+        response = self.client.get(
+            "/api/v1/arcticles/", HTTP_AUTHORIZATION=f"Basic {credentials}"
+        )
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_browsable_routes_accept_session_and_jwt(self):
+        self.client.login(username="testuser", password="password123")
+        response = self.client.get("/arcticles/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.client.logout()
+        response = self.client.get(
+            "/arcticles/", HTTP_AUTHORIZATION=f"Bearer {self.token}"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
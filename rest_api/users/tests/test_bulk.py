@@ -0,0 +1,150 @@
+import io
+import json
+import tempfile
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+User = get_user_model()
+
+
+def jsonl(*rows):
+    return "\n".join(json.dumps(row) for row in rows) + "\n"
+
+
+class BulkUserRegisterViewTest(APITestCase):
+
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            username="admin", email="admin@example.com", is_staff=True
+        )
+        User.objects.create_user(
+            username="existinguser", email="existinguser@example.com"
+        )
+        self.client.force_authenticate(user=self.admin)
+        self.url = reverse("bulk_register")
+
+    def post(self, body, content_type="application/x-ndjson"):
+        return self.client.generic("POST", self.url, body, content_type=content_type)
+
+    def test_register_jsonl(self):
+        body = jsonl(
+            {"username": "user1", "email": "user1@example.com", "password": "pass1"},
+            {"username": "user2", "password": "pass2"},
+        )
+        response = self.post(body)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {"created": 2, "errors": []})
+        self.assertTrue(User.objects.get(username="user1").check_password("pass1"))
+        self.assertEqual(User.objects.get(username="user2").email, "")
+
+    def test_register_csv(self):
+        body = "username,email,password\nuser1,user1@example.com,pass1\n"
+        response = self.post(body, content_type="text/csv")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["created"], 1)
+        self.assertTrue(User.objects.filter(username="user1").exists())
+
+    def test_invalid_rows_are_reported(self):
+        body = (
+            jsonl(
+                {"username": "existinguser", "password": "pass"},
+                {
+                    "username": "user1",
+                    "email": "existinguser@example.com",
+                    "password": "pass",
+                },
+                {"username": "user2", "password": "pass"},
+                {"username": "user2", "password": "pass"},
+                {"username": "user3"},
+            )
+            + "not json\n"
+        )
+        response = self.post(body)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["created"], 1)
+        self.assertEqual(
+            [(e["row"], list(e["errors"])) for e in response.data["errors"]],
+            [
+                (1, ["username"]),
+                (2, ["email"]),
+                (4, ["username"]),
+                (5, ["password"]),
+                (6, ["non_field_errors"]),
+            ],
+        )
+
+    def test_uniqueness_is_checked_per_chunk(self):
+        body = jsonl(
+            *[
+                {
+                    "username": f"user{i}",
+                    "email": f"user{i}@example.com",
+                    "password": "pass",
+                }
+                for i in range(20)
+            ]
+        )
+        # usernames, emails, savepoint, insert, release
+        with self.assertNumQueries(5):
+            response = self.post(body)
+        self.assertEqual(response.data["created"], 20)
+
+    def test_media_type_parameters(self):
+        body = "username,password\nuser1,pass1\n"
+        response = self.post(body, content_type="text/csv; charset=utf-8")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["created"], 1)
+        body = jsonl({"username": "user2", "password": "pass2"})
+        response = self.post(body, content_type="Application/X-NDJSON; charset=utf-8")
+        self.assertEqual(response.data["created"], 1)
+
+    def test_invalid_utf8_rows_are_reported(self):
+        body = (
+            jsonl(
+                {"username": "user1", "password": "pass1"},
+                {"username": "user3", "password": "pass3"},
+            ).encode()
+            + b'{"username": "user\xff", "password": "pass"}\n'
+        )
+        response = self.post(body)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["created"], 2)
+        self.assertEqual(
+            response.data["errors"],
+            [{"row": 3, "errors": {"non_field_errors": ["Invalid row."]}}],
+        )
+
+        body = b"username,password\nuser\xfe,pass\nuser4,pass4\n"
+        response = self.post(body, content_type="text/csv")
+        self.assertEqual(response.data["created"], 1)
+        self.assertEqual([error["row"] for error in response.data["errors"]], [1])
+
+    def test_unsupported_media_type(self):
+        response = self.post("{}", content_type="application/json")
+        self.assertEqual(response.status_code, status.HTTP_415_UNSUPPORTED_MEDIA_TYPE)
+
+    def test_requires_admin(self):
+        self.client.force_authenticate(user=User.objects.get(username="existinguser"))
+        response = self.post(jsonl({"username": "user1", "password": "pass"}))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class ImportUsersCommandTest(TestCase):
+
+    def test_import_csv(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".csv") as file:
+            file.write(
+                "username,email,password\n"
+                "user1,user1@example.com,pass1\n"
+                "user1,,pass\n"
+            )
+            file.flush()
+            stdout, stderr = io.StringIO(), io.StringIO()
+            call_command("import_users", file.name, stdout=stdout, stderr=stderr)
+        self.assertIn("Created 1 users, 1 rows failed.", stdout.getvalue())
+        self.assertEqual(json.loads(stderr.getvalue())["row"], 2)
+        self.assertTrue(User.objects.get(username="user1").check_password("pass1"))
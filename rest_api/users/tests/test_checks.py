@@ -0,0 +1,26 @@
+from django.test import SimpleTestCase, override_settings
+
+from rest_api.checks import check_shared_cache
+
+SHARED = {"BACKEND": "django.core.cache.backends.db.DatabaseCache"}
+LOCAL = {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+
+
+class SharedCacheCheckTest(SimpleTestCase):
+    @override_settings(CACHES={"default": LOCAL})
+    def test_process_local_cache(self):
+        errors = check_shared_cache(None)
+        self.assertEqual([error.id for error in errors], ["rest_api.E001"])
+
+    @override_settings(CACHES={"default": SHARED})
+    def test_shared_cache(self):
+        self.assertEqual(check_shared_cache(None), [])
+
+    @override_settings(
+        CACHES={"default": SHARED, "responses": LOCAL},
+        RESPONSE_CACHE={"ALIAS": "responses"},
+    )
+    def test_response_cache_alias(self):
+        errors = check_shared_cache(None)
+        self.assertEqual(len(errors), 1)
+        self.assertIn("'responses'", errors[0].msg)
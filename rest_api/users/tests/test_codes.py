@@ -0,0 +1,138 @@
+import io
+from unittest import mock
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APITestCase
+from users.codes import (
+    delete_expired_referral_codes,
+    encode_referral_code,
+    issue_referral_codes,
+)
+from users.models import ReferralCode
+
+User = get_user_model()
+
+
+class EncodeReferralCodeTest(TestCase):
+
+    def test_codes_are_unique(self):
+        codes = {encode_referral_code(user_id) for user_id in range(1, 20001)}
+        self.assertEqual(len(codes), 20000)
+
+    def test_code_format(self):
+        code = encode_referral_code(1)
+        self.assertEqual(len(code), 13)
+        self.assertEqual(code, encode_referral_code(1))
+        self.assertNotEqual(code, encode_referral_code(2))
+
+
+class IssueReferralCodesTest(TestCase):
+
+    def setUp(self):
+        self.users = [User.objects.create_user(username=f"user{i}") for i in range(5)]
+
+    def test_issue_skips_users_with_codes(self):
+        ReferralCode.objects.create(
+            user=self.users[0],
+            code="existing_code",
+            expiration_date=timezone.now() + timezone.timedelta(days=30),
+        )
+        issued = issue_referral_codes(User.objects.all(), chunk_size=2)
+        self.assertEqual(issued, 4)
+        self.assertEqual(ReferralCode.objects.count(), 5)
+        self.assertEqual(
+            ReferralCode.objects.get(user=self.users[0]).code, "existing_code"
+        )
+        self.assertEqual(
+            ReferralCode.objects.get(user=self.users[1]).code,
+            encode_referral_code(ReferralCode.objects.get(user=self.users[1]).id),
+        )
+
+    def test_one_insert_per_chunk(self):
+        # two chunks of lookup, savepoint, insert, select, update, release,
+        # and the empty lookup that ends the loop
+        with self.assertNumQueries(13):
+            issue_referral_codes(User.objects.all(), chunk_size=3)
+
+    def test_command(self):
+        stdout = io.StringIO()
+        call_command("issue_referral_codes", self.users[0].id, stdout=stdout)
+        self.assertIn("Issued 1 referral codes.", stdout.getvalue())
+        self.assertEqual(ReferralCode.objects.get().user, self.users[0])
+
+
+class DeleteExpiredReferralCodesTest(TestCase):
+
+    def setUp(self):
+        now = timezone.now()
+        self.codes = [
+            ReferralCode.objects.create(
+                user=User.objects.create_user(username=f"user{days}"),
+                code=f"code{days}",
+                expiration_date=now + timezone.timedelta(days=days),
+            )
+            for days in (-3, -2, -1, 1)
+        ]
+
+    def test_active_and_expired(self):
+        self.assertEqual(list(ReferralCode.objects.active()), self.codes[3:])
+        self.assertEqual(
+            list(ReferralCode.objects.expired().order_by("id")), self.codes[:3]
+        )
+
+    def test_deletes_in_batches(self):
+        # a lookup and a delete per batch, the short last batch ends the loop
+        with mock.patch("users.codes.time.sleep") as sleep:
+            deleted = delete_expired_referral_codes(batch_size=2, sleep=0.5)
+        self.assertEqual(deleted, 3)
+        sleep.assert_called_once_with(0.5)
+        self.assertEqual(list(ReferralCode.objects.all()), self.codes[3:])
+
+    def test_command(self):
+        stdout = io.StringIO()
+        call_command(
+            "delete_expired_referral_codes",
+            "--days",
+            "2",
+            "--sleep",
+            "0",
+            stdout=stdout,
+        )
+        self.assertIn("Deleted 2 expired referral codes.", stdout.getvalue())
+        self.assertEqual(list(ReferralCode.objects.order_by("id")), self.codes[2:])
+
+
+class ReferralCodeBulkViewTest(APITestCase):
+
+    def setUp(self):
+        self.admin = User.objects.create_user(username="admin", is_staff=True)
+        self.user = User.objects.create_user(username="user")
+        self.url = reverse("referral_codes-bulk")
+
+    def test_issue_codes(self):
+        self.client.force_authenticate(user=self.admin)
+        response = self.client.post(
+            self.url, {"user_ids": [self.user.id]}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data, {"issued": 1})
+        self.assertTrue(ReferralCode.objects.filter(user=self.user).exists())
+
+    def test_issue_codes_to_all_users(self):
+        self.client.force_authenticate(user=self.admin)
+        response = self.client.post(self.url, {"all_users": True}, format="json")
+        self.assertEqual(response.data, {"issued": 2})
+
+    def test_requires_users(self):
+        self.client.force_authenticate(user=self.admin)
+        response = self.client.post(self.url, {}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_requires_admin(self):
+        self.client.force_authenticate(user=self.user)
+        response = self.client.post(self.url, {"all_users": True}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
@@ -0,0 +1,110 @@
+import io
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from users.counters import add_referrals
+from users.models import Referral, ReferralCode, ReferralCounter
+
+User = get_user_model()
+
+
+def referral_count(user):
+    counter = ReferralCounter.objects.filter(user=user).first()
+    return counter.count if counter else 0
+
+
+class ReferralCounterTest(TestCase):
+    def setUp(self):
+        self.referrer = User.objects.create_user(username="referrer")
+
+    def test_signup_counts_the_referral(self):
+        ReferralCode.objects.create(
+            user=self.referrer,
+            code="code",
+            expiration_date=timezone.now() + timezone.timedelta(days=1),
+        )
+        response = self.client.post(
+            reverse("register_with_referral"),
+            {"referral_code": "code", "username": "referee", "password": "password123"},
+            content_type="application/json",
+        )
+        self.assertEqual(status.HTTP_201_CREATED, response.status_code)
+        self.assertEqual(referral_count(self.referrer), 1)
+
+    def test_create_and_delete(self):
+        referrals = [
+            Referral.objects.create(
+                referrer=self.referrer,
+                referee=User.objects.create_user(username=f"referee{i}"),
+            )
+            for i in range(2)
+        ]
+        self.assertEqual(referral_count(self.referrer), 2)
+        referrals[0].delete()
+        self.assertEqual(referral_count(self.referrer), 1)
+        referrals[1].referee.delete()
+        self.assertEqual(referral_count(self.referrer), 0)
+
+    def test_never_negative(self):
+        add_referrals(self.referrer.id, -1)
+        self.assertEqual(referral_count(self.referrer), 0)
+
+    def test_reconcile(self):
+        other = User.objects.create_user(username="other")
+        ReferralCounter.objects.create(user=other, count=5)
+        # bulk_create sends no signals
+        Referral.objects.bulk_create(
+            Referral(
+                referrer=self.referrer,
+                referee=User.objects.create_user(username=f"referee{i}"),
+            )
+            for i in range(3)
+        )
+        self.assertEqual(referral_count(self.referrer), 0)
+
+        stdout = io.StringIO()
+        call_command("reconcile_referral_counts", "--batch-size", "1", stdout=stdout)
+        self.assertIn("1 users", stdout.getvalue())
+        self.assertEqual(referral_count(self.referrer), 3)
+        self.assertEqual(referral_count(other), 0)
+
+
+class ReferralLeaderboardViewTest(APITestCase):
+    def setUp(self):
+        self.users = [User.objects.create_user(username=f"user{i}") for i in range(4)]
+        for user, count in zip(self.users, [2, 0, 5, 2]):
+            if count:
+                ReferralCounter.objects.create(user=user, count=count)
+        self.client.force_authenticate(user=self.users[0])
+        self.url = reverse("referral_leaderboard")
+
+    def test_ranking(self):
+        response = self.client.get(self.url)
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual(response.data["count"], 3)
+        self.assertEqual(
+            response.data["results"],
+            [
+                {"id": self.users[2].id, "username": "user2", "referrals": 5},
+                {"id": self.users[0].id, "username": "user0", "referrals": 2},
+                {"id": self.users[3].id, "username": "user3", "referrals": 2},
+            ],
+        )
+
+    def test_top_n(self):
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url, {"limit": 1})
+        self.assertEqual(
+            [row["username"] for row in response.data["results"]], ["user2"]
+        )
+
+    def test_requires_authentication(self):
+        self.client.force_authenticate(user=None)
+        response = self.client.get(self.url)
+        self.assertEqual(status.HTTP_401_UNAUTHORIZED, response.status_code)
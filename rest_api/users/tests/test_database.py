@@ -0,0 +1,16 @@
+from unittest import skipUnless
+from django.db import connection
+from django.test import TestCase
+
+
+@skipUnless(connection.vendor == "sqlite", "SQLite only")
+class SqlitePragmasTest(TestCase):
+
+    def pragma(self, name):
+        with connection.cursor() as cursor:
+            cursor.execute(f"PRAGMA {name}")
+            return cursor.fetchone()[0]
+
+    def test_pragmas_are_applied(self):
+        self.assertEqual(self.pragma("synchronous"), 1)  # NORMAL
+        self.assertEqual(self.pragma("busy_timeout"), 5000)
@@ -0,0 +1,157 @@
+import csv
+import io
+import json
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from users.export import EXPORTS, stream_rows
+from users.models import Arcticle, Referral
+
+User = get_user_model()
+
+
+def read(response):
+    return b"".join(response.streaming_content).decode()
+
+
+class ExportViewTest(APITestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser(
+            username="admin", email="admin@example.com", password="password"
+        )
+        self.client.force_authenticate(user=self.admin)
+        self.referees = [
+            User.objects.create_user(username=f"referee{i}") for i in range(3)
+        ]
+        self.referrals = [
+            Referral.objects.create(referrer=self.admin, referee=referee)
+            for referee in self.referees
+        ]
+
+    def test_export_jsonl(self):
+        response = self.client.get(reverse("export", args=["referrals"]))
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertTrue(response.streaming)
+        self.assertEqual(
+            response["Content-Type"], "application/x-ndjson; charset=utf-8"
+        )
+        rows = [json.loads(line) for line in read(response).splitlines()]
+        self.assertEqual(
+            rows,
+            [
+                {
+                    "id": referral.id,
+                    "referrer": self.admin.id,
+                    "referee": referral.referee_id,
+                    "created_at": referral.created_at.isoformat(),
+                }
+                for referral in self.referrals
+            ],
+        )
+
+    async def test_export_under_asgi(self):
+        token = await sync_to_async(
+            lambda: str(RefreshToken.for_user(self.admin).access_token)
+        )()
+        response = await self.async_client.get(
+            reverse("export", args=["referrals"]),
+            headers={"authorization": f"Bearer {token}"},
+        )
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        # An async iterator, so the server doesn't buffer the whole export
+        self.assertTrue(response.is_async)
+        body = b"".join([chunk async for chunk in response.streaming_content])
+        self.assertEqual(len(body.splitlines()), 3)
+
+    def test_export_csv(self):
+        Arcticle.objects.create(title="Arcticle, 1", content="Line 1\nLine 2")
+        response = self.client.get(
+            reverse("export", args=["arcticles"]), {"format": "csv"}
+        )
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual(response["Content-Type"], "text/csv; charset=utf-8")
+        rows = list(csv.DictReader(io.StringIO(read(response))))
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]["title"], "Arcticle, 1")
+        self.assertEqual(rows[0]["content"], "Line 1\nLine 2")
+
+    def test_csv_formulas_are_escaped(self):
+        for title in ("=1+1", "+1", "-1", "@SUM(A1)", "\t=1"):
+            Arcticle.objects.create(title=title, content="a - b")
+        response = self.client.get(
+            reverse("export", args=["arcticles"]), {"format": "csv"}
+        )
+        rows = list(csv.DictReader(io.StringIO(read(response))))
+        self.assertEqual(
+            [row["title"] for row in rows],
+            ["'=1+1", "'+1", "'-1", "'@SUM(A1)", "'\t=1"],
+        )
+        self.assertEqual(rows[0]["content"], "a - b")
+
+    def test_users_export_leaves_out_passwords(self):
+        response = self.client.get(reverse("export", args=["users"]))
+        rows = [json.loads(line) for line in read(response).splitlines()]
+        self.assertEqual(len(rows), 4)
+        self.assertNotIn("password", rows[0])
+
+    def test_incremental_export(self):
+        Referral.objects.filter(id=self.referrals[0].id).update(
+            created_at=timezone.now() - timedelta(days=1)
+        )
+        since = (timezone.now() - timedelta(hours=1)).isoformat()
+        response = self.client.get(
+            reverse("export", args=["referrals"]), {"created_after": since}
+        )
+        rows = [json.loads(line) for line in read(response).splitlines()]
+        self.assertEqual(
+            [row["id"] for row in rows],
+            [referral.id for referral in self.referrals[1:]],
+        )
+
+        response = self.client.get(
+            reverse("export", args=["referrals"]), {"id_after": self.referrals[1].id}
+        )
+        rows = [json.loads(line) for line in read(response).splitlines()]
+        self.assertEqual([row["id"] for row in rows], [self.referrals[2].id])
+
+    def test_invalid_filters(self):
+        url = reverse("export", args=["referrals"])
+        for params in ({"created_after": "yesterday"}, {"joined_after": "2024-01-01"}):
+            response = self.client.get(url, params)
+            self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
+
+    def test_unknown_export(self):
+        response = self.client.get(reverse("export", args=["passwords"]))
+        self.assertEqual(status.HTTP_404_NOT_FOUND, response.status_code)
+
+    def test_requires_admin(self):
+        self.client.force_authenticate(user=self.referees[0])
+        response = self.client.get(reverse("export", args=["users"]))
+        self.assertEqual(status.HTTP_403_FORBIDDEN, response.status_code)
+
+    def test_rows_are_read_in_chunks(self):
+        export = EXPORTS["referrals"]
+        chunks = list(stream_rows(export, export.get_queryset({}), "jsonl", 2))
+        self.assertEqual([chunk.count("\n") for chunk in chunks], [2, 1])
+
+
+class ExportCommandTest(TestCase):
+    def test_export_csv(self):
+        User.objects.create_user(username="user", email="user@example.com")
+        stdout = io.StringIO()
+        call_command("export", "users", "--format", "csv", stdout=stdout)
+        rows = list(csv.DictReader(io.StringIO(stdout.getvalue())))
+        self.assertEqual([row["email"] for row in rows], ["user@example.com"])
+
+    def test_invalid_filter(self):
+        with self.assertRaises(CommandError):
+            call_command("export", "users", "--id-after", "x", stdout=io.StringIO())
@@ -0,0 +1,56 @@
+from unittest import skipUnless
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.utils import timezone
+from users.models import Referral, ReferralCode, ReferralCounter, filter_by_email
+
+User = get_user_model()
+
+
+@skipUnless(connection.vendor in ("sqlite", "postgresql"), "EXPLAIN format")
+class IndexUsageTest(TestCase):
+
+    def explain(self, queryset):
+        if connection.vendor == "postgresql":
+            # Tables are tiny in tests, make the planner show what it would do
+            with connection.cursor() as cursor:
+                cursor.execute("SET LOCAL enable_seqscan = off")
+        return queryset.explain()
+
+    def test_case_insensitive_email_lookup(self):
+        plan = self.explain(filter_by_email(User.objects.all(), "User@Example.com"))
+        self.assertIn("users_auth_user_email_lower", plan)
+
+    def test_referral_code_by_email_lookup(self):
+        queryset = filter_by_email(
+            ReferralCode.objects.all(), "User@Example.com", "user__email"
+        )
+        self.assertIn("users_auth_user_email_lower", self.explain(queryset))
+
+    def test_referrals_by_referrer(self):
+        queryset = Referral.objects.filter(referrer_id=1).order_by("created_at", "id")
+        plan = self.explain(queryset)
+        self.assertIn("users_referral_referrer_idx", plan)
+        self.assertNotIn("TEMP B-TREE", plan)
+
+    def test_referral_codes_by_expiration(self):
+        queryset = ReferralCode.objects.filter(expiration_date__gt=timezone.now())
+        self.assertIn("users_refcode_expiration_idx", self.explain(queryset))
+
+    def test_referral_leaderboard(self):
+        queryset = ReferralCounter.objects.filter(count__gt=0).order_by(
+            "-count", "user"
+        )
+        plan = self.explain(queryset[:10])
+        self.assertIn("users_refcounter_rank_idx", plan)
+        self.assertNotIn("TEMP B-TREE", plan)
+
+
+class EmailLookupTest(TestCase):
+
+    def test_filter_by_email_ignores_case(self):
+        user = User.objects.create_user(username="user", email="User@Example.com")
+        self.assertEqual(
+            list(filter_by_email(User.objects.all(), "user@example.COM")), [user]
+        )
@@ -0,0 +1,146 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from rest_api import metrics
+from users.models import Referral
+from users.response_cache import get_response_cache
+
+User = get_user_model()
+
+
+class HistogramTest(SimpleTestCase):
+    def test_quantiles(self):
+        histogram = metrics.Histogram()
+        for i in range(1, 1001):
+            histogram.observe(i / 1000)
+        self.assertEqual(histogram.count, 1000)
+        for q in metrics.QUANTILES:
+            self.assertAlmostEqual(histogram.quantile(q), q, delta=q * 0.05)
+
+    def test_empty_and_overflow(self):
+        histogram = metrics.Histogram()
+        self.assertEqual(histogram.quantile(0.5), 0.0)
+        histogram.observe(3600)
+        self.assertEqual(histogram.counts[-1], 1)
+        self.assertEqual(histogram.quantile(0.99), metrics.BUCKETS[-1])
+
+
+class MetricsMiddlewareTest(APITestCase):
+    def setUp(self):
+        metrics.registry.reset()
+        self.addCleanup(metrics.registry.reset)
+        self.referrer = User.objects.create_user(username="referrer")
+        for i in range(3):
+            Referral.objects.create(
+                referrer=self.referrer,
+                referee=User.objects.create_user(username=f"referee{i}"),
+            )
+        self.url = reverse("referral_list", args=[self.referrer.id])
+
+    def stats(self, route="referral_list", method="GET"):
+        return metrics.registry.routes[(route, method)]
+
+    def test_records_request(self):
+        response = self.client.get(self.url)
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+
+        stats = self.stats()
+        self.assertEqual(stats.latency.count, 1)
+        self.assertEqual(stats.responses, {200: 1})
+        # The referrer check, the count and the page
+        self.assertEqual(stats.queries, 3)
+        self.assertEqual(
+            set(stats.totals), {"sql", "auth", "serialize", "render", "bytes"}
+        )
+        self.assertEqual(stats.totals["bytes"], len(response.content))
+        self.assertLess(
+            stats.totals["sql"] + stats.totals["serialize"] + stats.totals["render"],
+            stats.latency.sum,
+        )
+
+    def test_serialization_is_timed_for_every_action(self):
+        get_response_cache().clear()
+        self.client.force_authenticate(user=self.referrer)
+        response = self.client.post(
+            reverse("arcticle-list"), {"title": "Title", "content": "Content"}
+        )
+        self.assertEqual(status.HTTP_201_CREATED, response.status_code)
+        self.client.get(reverse("arcticle-detail", args=[response.data["id"]]))
+        self.assertIn("serialize", self.stats("arcticle-list", "POST").totals)
+        self.assertIn("serialize", self.stats("arcticle-detail").totals)
+
+    def test_nested_timing_is_counted_once(self):
+        request_metrics = metrics.RequestMetrics()
+        token = metrics._current.set(request_metrics)
+        self.addCleanup(metrics._current.reset, token)
+        with metrics.timed("serialize"):
+            with metrics.timed("serialize"):
+                time.sleep(0.01)
+        self.assertLess(request_metrics.phases["serialize"], 0.02)
+
+    async def test_records_async_requests(self):
+        response = await self.async_client.get(self.url)
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual(self.stats().queries, 3)
+
+    def test_unmatched_routes(self):
+        self.client.generic("BREW", "/nowhere/")
+        self.assertEqual(self.stats("<unmatched>", "OTHER").responses, {404: 1})
+
+    @override_settings(METRICS={"ENABLED": False, "TOKEN": ""})
+    def test_disabled(self):
+        self.client.get(self.url)
+        self.assertEqual(metrics.registry.routes, {})
+
+    @override_settings(METRICS={"ENABLED": True, "TOKEN": "secret"})
+    def test_prometheus_text(self):
+        self.client.get(self.url)
+        self.client.get(self.url)
+        response = self.client.get(
+            reverse("metrics"), HTTP_AUTHORIZATION="Bearer secret"
+        )
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual(
+            response["Content-Type"], "text/plain; version=0.0.4; charset=utf-8"
+        )
+        lines = response.content.decode().splitlines()
+        labels = 'route="referral_list",method="GET"'
+        self.assertIn("# TYPE http_request_duration_seconds histogram", lines)
+        self.assertIn(
+            f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} 2', lines
+        )
+        self.assertIn(f"http_request_db_queries_total{{{labels}}} 6", lines)
+        self.assertIn(f'http_responses_total{{{labels},status="200"}} 2', lines)
+        quantiles = [
+            line for line in lines if line.startswith("http_request_latency_seconds{")
+        ]
+        self.assertEqual(len(quantiles), 3)
+        self.assertTrue(
+            any(
+                line.startswith(
+                    "http_request_phase_seconds_total{" + labels + ',phase="serialize"}'
+                )
+                for line in lines
+            )
+        )
+
+    @override_settings(METRICS={"ENABLED": True, "TOKEN": "secret"})
+    def test_token(self):
+        url = reverse("metrics")
+        self.assertEqual(self.client.get(url).status_code, 401)
+        response = self.client.get(url, HTTP_AUTHORIZATION="Bearer wrong")
+        self.assertEqual(response.status_code, 401)
+        response = self.client.get(url, HTTP_AUTHORIZATION="Bearer secret")
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(METRICS={"ENABLED": True, "TOKEN": ""})
+    def test_no_token(self):
+        url = reverse("metrics")
+        self.assertEqual(self.client.get(url).status_code, 403)
+        with self.settings(DEBUG=True):
+            self.assertEqual(self.client.get(url).status_code, 200)
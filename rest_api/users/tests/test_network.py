@@ -0,0 +1,182 @@
+import io
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from users.models import Referral, ReferralClosure
+from users.network import downline, network_levels
+
+User = get_user_model()
+
+
+def build_tree(test):
+    """
+    root
+    ├── a
+    │   ├── c
+    │   │   └── e
+    │   └── d
+    └── b
+    """
+    test.users = {
+        name: User.objects.create_user(username=name)
+        for name in ["root", "a", "b", "c", "d", "e"]
+    }
+    for referrer, referee in [
+        ("root", "a"),
+        ("root", "b"),
+        ("a", "c"),
+        ("a", "d"),
+        ("c", "e"),
+    ]:
+        Referral.objects.create(
+            referrer=test.users[referrer], referee=test.users[referee]
+        )
+
+
+class DownlineTest(TestCase):
+    def setUp(self):
+        build_tree(self)
+
+    def names(self, rows):
+        return [(row["username"], row["depth"]) for row in rows]
+
+    def test_downline(self):
+        root = self.users["root"].id
+        with self.assertNumQueries(1):
+            rows = downline(root)
+        self.assertEqual(
+            self.names(rows),
+            [("a", 1), ("b", 1), ("c", 2), ("d", 2), ("e", 3)],
+        )
+        self.assertEqual(rows[2]["referrer"], self.users["a"].id)
+        rows = downline(root, max_depth=2, limit=2, offset=2)
+        self.assertEqual(self.names(rows), [("c", 2), ("d", 2)])
+
+    def test_network_levels(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(network_levels(self.users["root"].id), [2, 2, 1])
+        self.assertEqual(network_levels(self.users["root"].id, 2), [2, 2])
+        self.assertEqual(network_levels(self.users["a"].id), [2, 1])
+        self.assertEqual(network_levels(self.users["e"].id), [])
+
+    def test_cycle(self):
+        # a -> c -> e -> a, which is possible once root no longer refers a
+        Referral.objects.filter(referee=self.users["a"]).delete()
+        Referral.objects.create(referrer=self.users["e"], referee=self.users["a"])
+        self.assertEqual(network_levels(self.users["a"].id), [2, 1])
+        self.assertEqual(
+            self.names(downline(self.users["c"].id)), [("e", 1), ("a", 2), ("d", 3)]
+        )
+
+
+@override_settings(REFERRAL_CLOSURE_TABLE=True)
+class ClosureTest(TestCase):
+    def setUp(self):
+        build_tree(self)
+
+    def pairs(self):
+        ids = {user.id: name for name, user in self.users.items()}
+        return sorted(
+            (ids[ancestor], ids[descendant], depth)
+            for ancestor, descendant, depth in ReferralClosure.objects.values_list(
+                "ancestor", "descendant", "depth"
+            )
+        )
+
+    def test_kept_in_step_with_referrals(self):
+        pairs = self.pairs()
+        self.assertEqual(len(pairs), 9)
+        self.assertIn(("root", "e", 3), pairs)
+
+        call_command("rebuild_referral_closure", stdout=io.StringIO())
+        self.assertEqual(self.pairs(), pairs)
+
+    def test_unlink(self):
+        Referral.objects.get(referee=self.users["c"]).delete()
+        self.assertEqual(
+            self.pairs(),
+            [
+                ("a", "d", 1),
+                ("c", "e", 1),
+                ("root", "a", 1),
+                ("root", "b", 1),
+                ("root", "d", 2),
+            ],
+        )
+
+    def test_deleting_a_user(self):
+        self.users["a"].delete()
+        self.assertEqual(self.pairs(), [("c", "e", 1), ("root", "b", 1)])
+
+    def test_same_results_as_recursive_query(self):
+        root = self.users["root"].id
+        with self.assertNumQueries(1):
+            rows = downline(root, max_depth=3)
+        with override_settings(REFERRAL_CLOSURE_TABLE=False):
+            self.assertEqual(rows, downline(root, max_depth=3))
+            self.assertEqual(network_levels(root), [2, 2, 1])
+        self.assertEqual(network_levels(root), [2, 2, 1])
+
+    def test_cycle_is_not_linked(self):
+        Referral.objects.create(referrer=self.users["e"], referee=self.users["root"])
+        self.assertNotIn("e", [ancestor for ancestor, _, _ in self.pairs()])
+        Referral.objects.get(referee=self.users["root"]).delete()
+        self.assertEqual(len(self.pairs()), 9)
+
+
+class ReferralNetworkViewTest(APITestCase):
+    def setUp(self):
+        build_tree(self)
+        self.client.force_authenticate(user=self.users["root"])
+
+    def test_downline(self):
+        url = reverse("referral_downline", args=[self.users["root"].id])
+        response = self.client.get(url, {"depth": 2, "limit": 3})
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual(response.data["count"], 4)
+        self.assertEqual(
+            response.data["results"][2],
+            {
+                "id": self.users["c"].id,
+                "username": "c",
+                "referrer": self.users["a"].id,
+                "depth": 2,
+            },
+        )
+
+    def test_network(self):
+        url = reverse("referral_network", args=[self.users["root"].id])
+        response = self.client.get(url)
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual(
+            response.data,
+            {
+                "user": self.users["root"].id,
+                "depth": 20,
+                "size": 5,
+                "levels": [2, 2, 1],
+            },
+        )
+
+    @override_settings(REFERRAL_MAX_DEPTH=2)
+    def test_depth_limit(self):
+        url = reverse("referral_network", args=[self.users["root"].id])
+        for depth in (0, 3, "x"):
+            response = self.client.get(url, {"depth": depth})
+            self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
+
+    def test_unknown_referrer(self):
+        response = self.client.get(reverse("referral_downline", args=[0]))
+        self.assertEqual(status.HTTP_404_NOT_FOUND, response.status_code)
+
+    def test_requires_authentication(self):
+        self.client.force_authenticate(user=None)
+        response = self.client.get(
+            reverse("referral_network", args=[self.users["root"].id])
+        )
+        self.assertEqual(status.HTTP_401_UNAUTHORIZED, response.status_code)
@@ -0,0 +1,127 @@
+import datetime
+import io
+from decimal import Decimal
+from unittest import mock
+
+from django.test import SimpleTestCase
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.serializer_helpers import ReturnDict, ReturnList
+
+from users.parsers import FastJSONParser
+from users.renderers import CSVRenderer, FastJSONRenderer
+
+PAYLOAD = {
+    "count": 2,
+    "next": None,
+    "results": ReturnList(
+        [
+            ReturnDict(
+                {
+                    "referrer": {"id": 1, "username": "ünïcode"},
+                    "created_at": datetime.datetime(
+                        2024, 1, 2, 3, 4, 5, 6789, tzinfo=datetime.timezone.utc
+                    ),
+                },
+                serializer=None,
+            ),
+            {
+                "expiration_date": timezone.make_aware(
+                    datetime.datetime(2024, 1, 2),
+                    datetime.timezone(datetime.timedelta(hours=2)),
+                ),
+                "day": datetime.date(2024, 1, 2),
+                "amount": Decimal("1.25"),
+                "label": gettext_lazy("Not found."),
+                "content": "line\u2028separator\u2029",
+                "score": 0.1,
+                1: [True, False],
+            },
+        ],
+        serializer=None,
+    ),
+}
+
+
+class FastJSONRendererTest(SimpleTestCase):
+    def test_matches_json_renderer(self):
+        self.assertEqual(
+            FastJSONRenderer().render(PAYLOAD), JSONRenderer().render(PAYLOAD)
+        )
+
+    def test_indent_falls_back(self):
+        self.assertEqual(
+            FastJSONRenderer().render(PAYLOAD, "application/json; indent=4"),
+            JSONRenderer().render(PAYLOAD, "application/json; indent=4"),
+        )
+
+    def test_unsupported_values_fall_back(self):
+        data = {"big": 2**70}
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_exponent_floats_match(self):
+        values = [1e20, -1.5e16, 1e-5, 1.5e-7, 5e-324, 1e-4, 9999999999999998.0, 0.0]
+        self.assertEqual(
+            FastJSONRenderer().render({"scores": values}),
+            JSONRenderer().render({"scores": values}),
+        )
+        # Floats only reached through DRF's encoder are checked too
+        self.assertEqual(
+            FastJSONRenderer().render({"scores": set(values)}),
+            JSONRenderer().render({"scores": set(values)}),
+        )
+
+    def test_non_finite_floats_raise(self):
+        for value in (float("nan"), float("inf"), float("-inf")):
+            for data in ({"score": value}, {"scores": {value}}):
+                with self.assertRaises(ValueError):
+                    JSONRenderer().render(data)
+                with self.assertRaises(ValueError):
+                    FastJSONRenderer().render(data)
+
+    def test_without_orjson(self):
+        with mock.patch("users.renderers.orjson", None):
+            self.assertEqual(
+                FastJSONRenderer().render(PAYLOAD), JSONRenderer().render(PAYLOAD)
+            )
+
+
+class CSVRendererTest(SimpleTestCase):
+    def test_formulas_are_escaped(self):
+        data = {"detail": "=HYPERLINK(1)", "-field": ["@a", "b"]}
+        self.assertEqual(
+            CSVRenderer().render(data),
+            b"detail,'=HYPERLINK(1)\r\n'-field,'@a b\r\n",
+        )
+
+
+class FastJSONParserTest(SimpleTestCase):
+    body = '{"username": "ünïcode", "codes": [1, 2.5, null]}'.encode()
+
+    def test_matches_json_parser(self):
+        self.assertEqual(
+            FastJSONParser().parse(io.BytesIO(self.body)),
+            JSONParser().parse(io.BytesIO(self.body)),
+        )
+
+    def test_other_encodings(self):
+        body = self.body.decode().encode("utf-16")
+        data = FastJSONParser().parse(
+            io.BytesIO(body), parser_context={"encoding": "utf-16"}
+        )
+        self.assertEqual(data["username"], "ünïcode")
+
+    def test_invalid_json(self):
+        for body in (b'{"username": ', b'{"score": NaN}'):
+            with self.assertRaises(ParseError):
+                FastJSONParser().parse(io.BytesIO(body))
+
+    def test_without_orjson(self):
+        with mock.patch("users.parsers.orjson", None):
+            self.assertEqual(
+                FastJSONParser().parse(io.BytesIO(self.body)),
+                JSONParser().parse(io.BytesIO(self.body)),
+            )
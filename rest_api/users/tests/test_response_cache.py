@@ -0,0 +1,185 @@
+import threading
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.test import APITestCase
+
+from rest_api import routers
+from users.models import Arcticle
+from users.response_cache import cached_response, generation_key, invalidate
+
+User = get_user_model()
+
+
+class ArcticleResponseCacheTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="reader", password="password")
+        self.client.force_authenticate(user=self.user)
+        self.arcticle = Arcticle.objects.create(title="Arcticle 1", content="Content 1")
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_list_is_served_from_cache(self):
+        url = reverse("arcticle-list")
+        response = self.client.get(url)
+        with self.assertNumQueries(0):
+            cached = self.client.get(url)
+        self.assertEqual(status.HTTP_200_OK, cached.status_code)
+        self.assertEqual(cached.data, response.data)
+
+    def test_query_params_are_part_of_the_key(self):
+        url = reverse("arcticle-list")
+        self.client.get(url)
+        response = self.client.get(url, {"fields": "title"})
+        self.assertEqual(response.data["results"], [{"title": "Arcticle 1"}])
+
+    def test_save_invalidates_list_and_detail(self):
+        list_url = reverse("arcticle-list")
+        detail_url = reverse("arcticle-detail", args=[self.arcticle.id])
+        self.client.get(list_url)
+        self.client.get(detail_url)
+
+        self.arcticle.title = "Arcticle 2"
+        self.arcticle.save()
+        response = self.client.get(list_url)
+        self.assertEqual(response.data["results"][0]["title"], "Arcticle 2")
+        response = self.client.get(detail_url)
+        self.assertEqual(response.data["title"], "Arcticle 2")
+
+        self.arcticle.delete()
+        response = self.client.get(list_url)
+        self.assertEqual(response.data["results"], [])
+        response = self.client.get(detail_url)
+        self.assertEqual(status.HTTP_404_NOT_FOUND, response.status_code)
+
+    def test_other_details_stay_cached(self):
+        other = Arcticle.objects.create(title="Arcticle 2", content="Content 2")
+        detail_url = reverse("arcticle-detail", args=[other.id])
+        self.client.get(detail_url)
+
+        self.arcticle.title = "Arcticle 3"
+        self.arcticle.save()
+        with self.assertNumQueries(1):
+            self.client.get(detail_url)
+
+    def test_scope_is_part_of_the_key(self):
+        url = reverse("arcticle-list")
+        self.client.get(url)
+        admin = User.objects.create_superuser(username="admin", password="password")
+        self.client.force_authenticate(user=admin)
+        with self.assertNumQueries(2):
+            self.client.get(url)
+
+    @override_settings(ALLOWED_HOSTS=["testserver", "api.example.com"])
+    def test_origin_is_part_of_the_key(self):
+        # Pagination links are absolute, so each origin gets its own entry
+        Arcticle.objects.create(title="Arcticle 2", content="Content 2")
+        url = reverse("arcticle-list")
+        self.client.get(url, {"limit": 1})
+        for extra, origin in (
+            ({"HTTP_HOST": "api.example.com"}, "http://api.example.com/"),
+            ({"secure": True}, "https://testserver/"),
+        ):
+            response = self.client.get(url, {"limit": 1}, **extra)
+            self.assertTrue(response.data["next"].startswith(origin))
+
+
+@override_settings(
+    RESPONSE_CACHE={
+        "ALIAS": "default",
+        "TIMEOUT": 60,
+        "LOCK_TIMEOUT": 10,
+        "WAIT": 5,
+        "POLL_INTERVAL": 0.01,
+    }
+)
+class SingleFlightTest(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_concurrent_misses_compute_once(self):
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+
+        class View:
+            def get_permissions(self):
+                return []
+
+            @cached_response("test")
+            def list(self, request):
+                calls.append(request)
+                started.set()
+                release.wait(5)
+                return Response({"calls": len(calls)})
+
+        def get():
+            request = Request(RequestFactory().get("/things/"))
+            request.user = User(username="reader")
+            return View().list(request)
+
+        results = []
+        first = threading.Thread(target=lambda: results.append(get()))
+        first.start()
+        started.wait(5)
+        second = threading.Thread(target=lambda: results.append(get()))
+        second.start()
+        # Give the second request time to find the lock taken
+        time.sleep(0.1)
+        release.set()
+        first.join()
+        second.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual([response.data for response in results], [{"calls": 1}] * 2)
+
+
+@override_settings(DATABASE_REPLICAS=["replica_1"])
+class ReplicaFillTest(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def tearDown(self):
+        cache.clear()
+
+    def fill(self):
+        """Returns the alias a cache miss reads from."""
+        aliases = []
+
+        class View:
+            def get_permissions(self):
+                return []
+
+            @cached_response("test")
+            def list(self, request):
+                aliases.append(User.objects.all().db)
+                return Response({})
+
+        request = RequestFactory().get("/things/")
+        token = routers.begin_request(request)
+        try:
+            request = Request(request)
+            request.user = User(username="reader")
+            View().list(request)
+        finally:
+            routers.end_request(token)
+        return aliases[0]
+
+    def test_fill_after_invalidation_reads_primary(self):
+        invalidate("test", 1)
+        self.assertEqual(self.fill(), "default")
+
+    def test_fill_reads_replica_once_caught_up(self):
+        cache.set(generation_key("test"), f"{time.time() - 60:.6f}-old", None)
+        self.assertEqual(self.fill(), "replica_1")
@@ -0,0 +1,132 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.cache.backends.db import DatabaseCache
+from django.core.management import call_command
+from django.db import router
+from django.test import (
+    RequestFactory,
+    SimpleTestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from rest_api.middleware import ReplicaRoutingMiddleware
+from rest_api.routers import get_pin_key
+
+User = get_user_model()
+
+REPLICAS = ["replica_1", "replica_2"]
+
+
+@override_settings(DATABASE_REPLICAS=REPLICAS)
+class ReplicaRouterTest(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+
+    def tearDown(self):
+        cache.clear()
+
+    def route(self, request, write=False):
+        """Returns the alias reads are routed to while handling `request`."""
+        aliases = []
+
+        def get_response(request):
+            if write:
+                router.db_for_write(User)
+            aliases.append(User.objects.all().db)
+            return None
+
+        ReplicaRoutingMiddleware(get_response)(request)
+        return aliases[0]
+
+    def test_safe_requests_read_from_replicas(self):
+        self.assertIn(self.route(self.factory.get("/")), REPLICAS)
+
+    def test_unsafe_requests_read_from_primary(self):
+        self.assertEqual(self.route(self.factory.post("/")), "default")
+
+    def test_reads_after_a_write_use_primary(self):
+        self.assertEqual(self.route(self.factory.get("/"), write=True), "default")
+
+    def test_writers_are_pinned_to_primary(self):
+        headers = {"HTTP_AUTHORIZATION": "Bearer token"}
+        self.route(self.factory.post("/", **headers), write=True)
+        self.assertEqual(self.route(self.factory.get("/", **headers)), "default")
+        other = {"HTTP_AUTHORIZATION": "Bearer other"}
+        self.assertIn(self.route(self.factory.get("/", **other)), REPLICAS)
+
+        cache.clear()
+        self.assertIn(self.route(self.factory.get("/", **headers)), REPLICAS)
+
+    def test_reads_outside_requests_use_primary(self):
+        self.assertEqual(User.objects.all().db, "default")
+
+    def test_database_cache_uses_primary(self):
+        entry = DatabaseCache("django_cache", {}).cache_model_class
+        aliases = []
+
+        def get_response(request):
+            router.db_for_write(entry)
+            aliases.append((router.db_for_read(entry), User.objects.all().db))
+
+        ReplicaRoutingMiddleware(get_response)(self.factory.get("/"))
+        cache_alias, user_alias = aliases[0]
+        self.assertEqual(cache_alias, "default")
+        # Storing a cache entry isn't a write that pins reads to the primary
+        self.assertIn(user_alias, REPLICAS)
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_no_replicas(self):
+        self.assertEqual(self.route(self.factory.get("/")), "default")
+
+
+@override_settings(
+    CACHES={
+        "default": {
+            "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+            "LOCATION": "replica_pin_test_cache",
+        }
+    }
+)
+class AsyncReplicaPinTest(TransactionTestCase):
+    def setUp(self):
+        call_command("createcachetable", verbosity=0)
+        self.user = User.objects.create_user(username="writer")
+        token = RefreshToken.for_user(self.user).access_token
+        self.headers = {"authorization": f"Bearer {token}"}
+        # Where the pin would go with replicas configured
+        with self.settings(DATABASE_REPLICAS=REPLICAS):
+            self.pin_key = get_pin_key(
+                RequestFactory().get(
+                    "/", HTTP_AUTHORIZATION=self.headers["authorization"]
+                )
+            )
+
+    async def create_arcticle(self):
+        return await self.async_client.post(
+            reverse("arcticle-list"),
+            {"title": "Arcticle 1", "content": "Content 1"},
+            content_type="application/json",
+            headers=self.headers,
+        )
+
+    @override_settings(DATABASE_REPLICAS=["default"])
+    async def test_writers_are_pinned_under_asgi(self):
+        response = await self.create_arcticle()
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(await cache.aget(self.pin_key))
+        # The pin is read back without blocking the event loop too
+        response = await self.async_client.get(
+            reverse("arcticle-list"), headers=self.headers
+        )
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(DATABASE_REPLICAS=[])
+    async def test_no_pins_without_replicas(self):
+        response = await self.create_arcticle()
+        self.assertEqual(response.status_code, 201)
+        self.assertIsNone(await cache.aget(self.pin_key))
@@ -0,0 +1,154 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import serializers, status
+from rest_framework.test import APITestCase
+
+from users.models import Arcticle
+from users.search import search_arcticles, search_terms
+
+User = get_user_model()
+
+
+def ids(queryset):
+    return list(queryset.values_list("id", flat=True))
+
+
+class SearchArcticlesTest(TestCase):
+    def setUp(self):
+        self.keyset = Arcticle.objects.create(
+            title="Keyset pagination", content="Deep pages cost as much as the first."
+        )
+        self.caching = Arcticle.objects.create(
+            title="Caching",
+            content="Cached pages skip the database. See also keyset pagination.",
+        )
+        self.other = Arcticle.objects.create(title="Other", content="Nothing here.")
+
+    def search(self, text, **kwargs):
+        return search_arcticles(Arcticle.objects.all(), text, **kwargs)
+
+    def test_title_matches_rank_first(self):
+        self.assertEqual(
+            ids(self.search("pagination")), [self.keyset.id, self.caching.id]
+        )
+
+    def test_every_term_must_match(self):
+        self.assertEqual(ids(self.search("cached database")), [self.caching.id])
+        self.assertEqual(ids(self.search("cached nothing")), [])
+
+    def test_prefix(self):
+        self.assertEqual(ids(self.search("pag")), [self.keyset.id, self.caching.id])
+        self.assertEqual(ids(self.search("cach")), [self.caching.id])
+
+    def test_query_syntax_is_ignored(self):
+        self.assertEqual(search_terms('title:"keyset" OR *'), ["title", "keyset", "OR"])
+        self.assertEqual(ids(self.search('"other')), [self.other.id])
+        self.assertEqual(ids(self.search("*")), [])
+
+    def test_snippet(self):
+        result = self.search("database", snippets=True).get()
+        self.assertEqual(
+            result.snippet,
+            "Cached pages skip the <mark>database</mark>. See also keyset pagination.",
+        )
+
+    def test_snippet_is_escaped(self):
+        Arcticle.objects.create(
+            title="Markup", content='<script>alert("x")</script> & <mark>tags</mark>'
+        )
+        result = self.search("alert", snippets=True).get()
+        self.assertEqual(
+            result.snippet,
+            "&lt;script&gt;<mark>alert</mark>(&quot;x&quot;)&lt;/script&gt; &amp; "
+            "&lt;mark&gt;tags&lt;/mark&gt;",
+        )
+
+    def test_snippet_is_cut_from_content(self):
+        # Only the title matches, the snippet still shows the content
+        result = self.search("caching", snippets=True).get()
+        self.assertEqual(result.snippet, self.caching.content)
+
+    def test_index_follows_saves_and_deletes(self):
+        self.other.content = "Pagination, once more."
+        self.other.save()
+        self.assertIn(self.other.id, ids(self.search("pagination")))
+        self.assertEqual(ids(self.search("nothing")), [])
+
+        Arcticle.objects.filter(id=self.keyset.id).update(title="Keys")
+        self.assertEqual(ids(self.search("keys")), [self.keyset.id, self.caching.id])
+        self.assertEqual(ids(self.search("keyset")), [self.caching.id])
+
+        self.caching.delete()
+        self.assertEqual(ids(self.search("keyset")), [])
+
+
+class ArcticleSearchApiTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="user")
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse("arcticle-list")
+        self.first = Arcticle.objects.create(
+            title="Intro", content="Searching made easy"
+        )
+        self.second = Arcticle.objects.create(title="Search", content="Full-text")
+
+    def test_search(self):
+        response = self.client.get(self.url, {"q": "search"})
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual(response.data["count"], 2)
+        self.assertEqual(
+            response.data["results"],
+            [
+                {"id": self.second.id, "title": "Search"},
+                {"id": self.first.id, "title": "Intro"},
+            ],
+        )
+
+    def test_search_refuses_cursor_pagination(self):
+        response = self.client.get(self.url, {"q": "search", "pagination": "cursor"})
+        self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
+        self.assertIn("pagination", response.data)
+
+    def test_filter_with_cursor_pagination(self):
+        updated_after = (self.first.updated_at - timedelta(days=1)).isoformat()
+        response = self.client.get(
+            self.url, {"updated_after": updated_after, "pagination": "cursor"}
+        )
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual(
+            [arcticle["id"] for arcticle in response.data["results"]],
+            [self.first.id, self.second.id],
+        )
+
+    def test_search_with_snippets(self):
+        with mock.patch.object(
+            serializers.Serializer, "to_representation", side_effect=AssertionError
+        ):
+            response = self.client.get(self.url, {"q": "eas", "fields": "id,snippet"})
+        self.assertEqual(
+            response.data["results"],
+            [{"id": self.first.id, "snippet": "Searching made <mark>easy</mark>"}],
+        )
+
+    def test_snippet_without_search(self):
+        response = self.client.get(self.url, {"fields": "id,snippet"})
+        self.assertEqual(
+            response.data["results"][0], {"id": self.first.id, "snippet": None}
+        )
+
+    def test_updated_after(self):
+        Arcticle.objects.filter(id=self.first.id).update(
+            updated_at=timezone.now() - timedelta(days=1)
+        )
+        since = timezone.now() - timedelta(hours=1)
+        response = self.client.get(self.url, {"updated_after": since.isoformat()})
+        self.assertEqual(
+            [row["id"] for row in response.data["results"]], [self.second.id]
+        )
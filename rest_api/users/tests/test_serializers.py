@@ -1,8 +1,26 @@
 from django.test import TestCase
 from rest_framework.test import APITestCase
 from rest_framework import status
-from users.models import Arcticle
-from users.serializers import ArcticleSerializer, UserRegistrationSerializer
+from datetime import timedelta
+from unittest import mock
+from django.urls import reverse
+from rest_framework import serializers
+from django.db.models.functions import Substr
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from users.fastpath import NotCompilable, RowReader, serialize_rows
+from users.models import Arcticle, Referral, ReferralCode
+from users.serializers import (
+    ArcticleListSerializer,
+    ArcticleSerializer,
+    ReferralCodeSerializer,
+    ReferralSerializer,
+    TemplatedHyperlinkedIdentityField,
+    UserRegistrationSerializer,
+    UserSerializer,
+)
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
@@ -43,6 +61,16 @@ class UserRegistrationSerializerTest(TestCase):
             serializer.errors["email"][0], "A user with that email already exists."
         )
 
+    def test_email_already_exists_ignores_case(self):
+        invalid_user_data = {
+            "username": "newuser",
+            "email": "ExistingUser@Example.com",
+            "password": "password123",
+        }
+        serializer = UserRegistrationSerializer(data=invalid_user_data)
+        self.assertFalse(serializer.is_valid())
+        self.assertIn("email", serializer.errors)
+
     def test_password_not_returned_in_response(self):
         serializer = UserRegistrationSerializer(data=self.valid_user_data)
         self.assertTrue(serializer.is_valid())
@@ -82,3 +110,105 @@ class ArcticleSerializerTestCase(APITestCase):
             },
         ]
         self.assertEqual(expected_data, data)
+
+    def test_fast_path(self):
+        Arcticle.objects.create(title="Arcticle 1", content="Content 1")
+        Arcticle.objects.create(title="Arcticle 2", content="Content 2")
+        queryset = Arcticle.objects.order_by("id")
+        data = ArcticleSerializer(queryset, many=True).data
+        fast = serialize_rows(ArcticleSerializer(), queryset)
+        self.assertEqual(JSONRenderer().render(fast), JSONRenderer().render(data))
+
+    def test_fast_path_with_annotation(self):
+        Arcticle.objects.create(title="Arcticle 1", content="x" * 500)
+        queryset = Arcticle.objects.annotate(excerpt=Substr("content", 1, 200))
+        request = Request(APIRequestFactory().get("/", {"fields": "id,excerpt"}))
+        serializer = ArcticleListSerializer(context={"request": request})
+        self.assertEqual(
+            serialize_rows(serializer, queryset),
+            ArcticleListSerializer(
+                queryset, many=True, context={"request": request}
+            ).data,
+        )
+
+
+class FastPathSerializerTestCase(APITestCase):
+    def setUp(self):
+        self.context = {"request": Request(APIRequestFactory().get("/"))}
+        self.referrer = User.objects.create_user(
+            username="referrer", email="referrer@example.com", is_staff=True
+        )
+        for i in range(2):
+            referee = User.objects.create_user(username=f"referee{i}")
+            Referral.objects.create(referrer=self.referrer, referee=referee)
+        ReferralCode.objects.create(
+            user=self.referrer,
+            code="abc",
+            expiration_date=timezone.now() + timedelta(days=1, microseconds=7),
+        )
+
+    def assertSameOutput(self, serializer_class, queryset):
+        data = serializer_class(queryset, many=True, context=self.context).data
+        fast = serialize_rows(serializer_class(context=self.context), queryset)
+        self.assertEqual(fast, data)
+        self.assertEqual(JSONRenderer().render(fast), JSONRenderer().render(data))
+
+    def test_referral_codes(self):
+        self.assertSameOutput(ReferralCodeSerializer, ReferralCode.objects.all())
+
+    def test_referrals(self):
+        self.assertSameOutput(ReferralSerializer, Referral.objects.order_by("id"))
+
+    def test_not_compilable(self):
+        # Hyperlinks can't be built without the request
+        with self.assertRaises(NotCompilable):
+            RowReader(ReferralSerializer(), Referral.objects.all())
+
+    def test_to_representation_overrides_are_not_compilable(self):
+        class Overridden(ReferralCodeSerializer):
+            def to_representation(self, instance):
+                return {"code": instance.code.upper()}
+
+        class Inherited(Overridden):
+            pass
+
+        for serializer_class in (Overridden, Inherited):
+            with self.assertRaises(NotCompilable):
+                RowReader(serializer_class(), ReferralCode.objects.all())
+
+
+class TemplatedHyperlinkTestCase(APITestCase):
+    def setUp(self):
+        self.users = [User.objects.create_user(username=f"user{i}") for i in range(3)]
+
+    def test_matches_reverse_under_both_mounts(self):
+        for path in (reverse("user-list"), "/users/"):
+            for format in (None, "json"):
+                request = Request(APIRequestFactory().get(path))
+                context = {"request": request, "format": format}
+                expected = [
+                    serializers.HyperlinkedIdentityField(
+                        view_name="user-detail"
+                    ).get_url(user, "user-detail", request, format)
+                    for user in self.users
+                ]
+                data = UserSerializer(self.users, many=True, context=context).data
+                self.assertEqual([user["url"] for user in data], expected)
+
+    def test_reverses_once_per_request(self):
+        context = {"request": Request(APIRequestFactory().get("/users/"))}
+        with mock.patch(
+            "rest_framework.reverse.django_reverse", wraps=reverse
+        ) as django_reverse:
+            UserSerializer(self.users, many=True, context=context).data
+        self.assertEqual(django_reverse.call_count, 1)
+
+    def test_non_integer_lookups_use_reverse(self):
+        field = TemplatedHyperlinkedIdentityField(
+            view_name="user-detail", lookup_field="username", lookup_url_kwarg="pk"
+        )
+        request = Request(APIRequestFactory().get("/users/"))
+        self.assertEqual(
+            field.get_url(self.users[0], "user-detail", request, None),
+            "http://testserver/api/v1/users/user0/",
+        )
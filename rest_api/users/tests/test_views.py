@@ -1,9 +1,19 @@
+import asyncio
+import warnings
+from unittest import mock
 from rest_framework import status
 from rest_framework.test import APITestCase
 from rest_framework.reverse import reverse
 from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.core.cache.backends.base import CacheKeyWarning
+from django.db import IntegrityError, connection
+from django.test import AsyncClient, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
-from users.models import ReferralCode
+from users.codes import referral_code_cache_key
+from users.models import Referral, ReferralCode, ReferralCounter
 
 User = get_user_model()
 
@@ -34,6 +44,17 @@ class ReferralCodeViewSetTest(APITestCase):
         response = self.client.post(self.url_list, {})
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
         self.assertEqual(ReferralCode.objects.filter(user=self.user).count(), 1)
+        self.assertEqual(
+            response.data["code"], ReferralCode.objects.get(user=self.user).code
+        )
+
+    def test_regenerated_referral_code_differs(self):
+        code = self.client.post(self.url_list, {}).data
+        self.client.delete(reverse("referral_codes-detail", args=[code["id"]]))
+        response = self.client.post(self.url_list, {})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertNotEqual(response.data["code"], code["code"])
+        self.assertFalse(ReferralCode.objects.filter(code=code["code"]).exists())
 
     def test_user_cannot_create_multiple_referral_codes(self):
         expiration_date = timezone.now() + timezone.timedelta(days=30)
@@ -86,3 +107,271 @@ class GetReferralCodeByEmailViewTest(APITestCase):
         response = self.client.get(self.url, data, format="json")
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.data.get("code"), "test_code")
+
+    def test_expired_referral_code(self):
+        expiration_date = timezone.now() - timezone.timedelta(seconds=1)
+        ReferralCode.objects.create(
+            user=self.user, code="test_code", expiration_date=expiration_date
+        )
+        response = self.client.get(self.url, {"email": "testuser@example.com"})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class ReferralListViewTest(APITestCase):
+
+    def setUp(self):
+        self.referrer = User.objects.create_user(
+            username="referrer", email="referrer@example.com", password="password123"
+        )
+        self.url = reverse("referral_list", args=[self.referrer.id])
+
+    def create_referrals(self, count):
+        for i in range(count):
+            referee = User.objects.create_user(
+                username=f"referee{i}", email=f"referee{i}@example.com"
+            )
+            Referral.objects.create(referrer=self.referrer, referee=referee)
+
+    def test_list_referrals(self):
+        self.create_referrals(3)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["count"], 3)
+        self.assertEqual(
+            [r["referee"]["username"] for r in response.data["results"]],
+            ["referee0", "referee1", "referee2"],
+        )
+        self.assertEqual(
+            response.data["results"][0]["referrer"]["username"], "referrer"
+        )
+
+    def test_referrals_are_paginated(self):
+        self.create_referrals(3)
+        response = self.client.get(self.url, {"limit": 2, "offset": 2})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["results"]), 1)
+        self.assertEqual(response.data["results"][0]["referee"]["username"], "referee2")
+
+    def test_query_count_does_not_grow_with_referrals(self):
+        # referrer lookup + count + page
+        self.create_referrals(1)
+        with self.assertNumQueries(3):
+            self.client.get(self.url)
+        for i in range(1, 10):
+            referee = User.objects.create_user(username=f"extra{i}")
+            Referral.objects.create(referrer=self.referrer, referee=referee)
+        with self.assertNumQueries(3):
+            response = self.client.get(self.url)
+        self.assertEqual(len(response.data["results"]), 10)
+
+    def test_unknown_referrer(self):
+        url = reverse("referral_list", args=[self.referrer.id + 100])
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class UserLoginViewTest(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="testuser", email="testuser@example.com", password="password123"
+        )
+        self.url = reverse("login")
+
+    def test_login(self):
+        data = {"username": "testuser", "password": "password123"}
+        response = self.client.post(self.url, data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn("access", response.data)
+        self.assertIn("refresh", response.data)
+
+    def test_invalid_credentials(self):
+        data = {"username": "testuser", "password": "wrongpassword"}
+        response = self.client.post(self.url, data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data["non_field_errors"][0], "Invalid Credentials")
+
+    def test_unknown_user(self):
+        data = {"username": "nobody", "password": "password123"}
+        response = self.client.post(self.url, data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_inactive_user(self):
+        self.user.is_active = False
+        self.user.save()
+        data = {"username": "testuser", "password": "password123"}
+        response = self.client.post(self.url, data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data["detail"], "Inactive user")
+
+    def test_login_upgrades_password_hash(self):
+        self.user.password = make_password("password123", hasher="pbkdf2_sha256")
+        self.user.save()
+        data = {"username": "testuser", "password": "password123"}
+        response = self.client.post(self.url, data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith("scrypt$"))
+
+
+class RegisterWithReferralCodeViewTest(APITestCase):
+
+    def setUp(self):
+        self.referrer = User.objects.create_user(
+            username="referrer", email="referrer@example.com", password="password123"
+        )
+        self.referral_code = ReferralCode.objects.create(
+            user=self.referrer,
+            code="test_code",
+            expiration_date=timezone.now() + timezone.timedelta(days=30),
+        )
+        self.url = reverse("register_with_referral")
+        self.data = {
+            "referral_code": "test_code",
+            "username": "newuser",
+            "password": "password123",
+            "email": "newuser@example.com",
+        }
+
+    def test_register(self):
+        response = self.client.post(self.url, self.data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        user = User.objects.get(username="newuser")
+        self.assertTrue(user.check_password("password123"))
+        self.assertEqual(user.referred_by.referrer, self.referrer)
+
+    def test_missing_fields(self):
+        del self.data["password"]
+        response = self.client.post(self.url, self.data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_invalid_code(self):
+        self.data["referral_code"] = "unknown"
+        response = self.client.post(self.url, self.data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data["error"], "Invalid referral code.")
+
+    def test_expired_code(self):
+        self.referral_code.expiration_date = timezone.now() - timezone.timedelta(days=1)
+        self.referral_code.save()
+        response = self.client.post(self.url, self.data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data["error"], "Referral code is expired.")
+        self.assertFalse(User.objects.filter(username="newuser").exists())
+
+    def test_username_conflict(self):
+        User.objects.create_user(username="newuser")
+        response = self.client.post(self.url, self.data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(
+            response.data["error"], "A user with that username already exists."
+        )
+
+    def test_email_conflict(self):
+        User.objects.create_user(username="otheruser", email="newuser@example.com")
+        response = self.client.post(self.url, self.data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(
+            response.data["error"], "A user with that email already exists."
+        )
+
+    def test_signup_is_atomic(self):
+        with mock.patch.object(Referral.objects, "create", side_effect=IntegrityError):
+            response = self.client.post(self.url, self.data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertFalse(User.objects.filter(username="newuser").exists())
+
+    def test_referral_code_is_cached(self):
+        response = self.client.post(self.url, self.data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.data["username"] = "otheruser"
+        self.data["email"] = "otheruser@example.com"
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(self.url, self.data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertFalse(any("users_referralcode" in query["sql"] for query in queries))
+
+    def test_deleted_referral_code_is_not_cached(self):
+        self.client.post(self.url, self.data, format="json")
+        self.client.force_authenticate(user=self.referrer)
+        url = reverse("referral_codes-detail", args=[self.referral_code.id])
+        self.client.delete(url)
+        self.data["username"] = "otheruser"
+        response = self.client.post(self.url, self.data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data["error"], "Invalid referral code.")
+
+    def test_deleted_referral_code_is_dropped_on_commit(self):
+        key = referral_code_cache_key("test_code")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.referral_code.delete()
+            # A signup that read the code before the delete committed
+            cache.set(key, (self.referrer.id, self.referral_code.expiration_date))
+        self.assertIsNone(cache.get(key))
+
+    def test_cached_referral_code_past_expiration(self):
+        key = referral_code_cache_key("test_code")
+        expired = timezone.now() - timezone.timedelta(seconds=1)
+        cache.set(key, (self.referrer.id, expired))
+        self.addCleanup(cache.delete, key)
+        response = self.client.post(self.url, self.data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data["error"], "Referral code is expired.")
+        self.assertFalse(User.objects.filter(username="newuser").exists())
+
+    def test_overlong_referral_code_is_not_looked_up(self):
+        self.data["referral_code"] = "x" * 300
+        with self.assertNumQueries(0):
+            response = self.client.post(self.url, self.data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data["error"], "Invalid referral code.")
+
+    def test_referral_code_cache_key_is_memcached_safe(self):
+        self.data["referral_code"] = "bad code\n"
+        with warnings.catch_warnings():
+            warnings.simplefilter("error", CacheKeyWarning)
+            response = self.client.post(self.url, self.data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data["error"], "Invalid referral code.")
+
+    def test_expired_referral_code_is_not_cached(self):
+        self.referral_code.expiration_date = timezone.now() - timezone.timedelta(days=1)
+        self.referral_code.save()
+        self.client.post(self.url, self.data, format="json")
+        self.assertIsNone(cache.get(referral_code_cache_key("test_code")))
+
+
+class ConcurrentReferralSignupTest(TransactionTestCase):
+
+    def setUp(self):
+        referrer = User.objects.create_user(username="referrer")
+        ReferralCode.objects.create(
+            user=referrer,
+            code="hot_code",
+            expiration_date=timezone.now() + timezone.timedelta(days=30),
+        )
+        self.url = reverse("register_with_referral")
+
+    async def signup(self, client, username):
+        data = {
+            "referral_code": "hot_code",
+            "username": username,
+            "password": "password123",
+        }
+        response = await client.post(self.url, data, content_type="application/json")
+        return response.status_code
+
+    async def signups(self, usernames):
+        client = AsyncClient()
+        return await asyncio.gather(
+            *[self.signup(client, username) for username in usernames]
+        )
+
+    def test_parallel_signups_on_the_same_code(self):
+        usernames = [f"user{i}" for i in range(10)] + ["duplicate"] * 10
+        statuses = asyncio.run(self.signups(usernames))
+        self.assertEqual(statuses.count(status.HTTP_201_CREATED), 11)
+        self.assertEqual(statuses.count(status.HTTP_409_CONFLICT), 9)
+        self.assertEqual(Referral.objects.count(), 11)
+        self.assertEqual(ReferralCounter.objects.get().count, 11)
+        self.assertEqual(User.objects.count(), 12)
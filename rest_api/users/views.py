@@ -1,40 +1,191 @@
-import uuid
-from rest_framework import status, generics, viewsets
+import asyncio
+from asgiref.sync import sync_to_async
+from rest_framework import serializers, status, generics, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound, UnsupportedMediaType, ValidationError
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
 from rest_framework.views import APIView
 from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
-from .models import Arcticle, ReferralCode, Referral
+from . import bulk
+from .codes import (
+    REFERRAL_CODE_LIFETIME,
+    aget_referral_code,
+    issue_referral_codes,
+    save_referral_code,
+)
+from .conditional import conditional_arcticle
+from .export import EXPORTS, aiterate, stream_rows
+from .fastpath import FastListMixin
+from .filters import ArcticleFilter
+from .network import Downline, network_levels
+from .models import Arcticle, ReferralCode, Referral, ReferralCounter, filter_by_email
+from .pagination import LimitOffsetOrCursorPagination
+from .passwords import acheck_password, amake_password
+from .renderers import CSVRenderer, NDJSONRenderer
+from .response_cache import cached_response
 from .serializers import (
     ReferralSerializer,
+    ReferralLeaderboardSerializer,
+    ReferralDepthSerializer,
+    ReferralDownlineSerializer,
+    LoginCredentialsSerializer,
     UserLoginSerializer,
     ArcticleSerializer,
+    ArcticleListSerializer,
     UserSerializer,
     UserRegistrationSerializer,
     ReferralCodeSerializer,
+    ReferralCodeBatchSerializer,
 )
 from django.contrib.auth.models import User
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db import IntegrityError, transaction
+from django.db.models.functions import Substr
+from django.http import StreamingHttpResponse
 from django.utils import timezone
+from django_filters.rest_framework import DjangoFilterBackend
+
+EXCERPT_LENGTH = 200
 
 
 class UserViewSet(viewsets.ModelViewSet):
     queryset = User.objects.all()
     serializer_class = UserSerializer
     permission_classes = [IsAdminUser]
+    pagination_class = LimitOffsetOrCursorPagination
 
 
-class UserRegisterView(generics.CreateAPIView):
-    queryset = User.objects.all()
+class AsyncAPIView(APIView):
+    """
+    APIView with `async def` handlers. Authentication, permissions and
+    throttling still run synchronously, in a thread.
+    """
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(
+                    self, request.method.lower(), self.http_method_not_allowed
+                )
+            else:
+                handler = self.http_method_not_allowed
+
+            response = handler(request, *args, **kwargs)
+            if asyncio.iscoroutine(response):
+                response = await response
+
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+
+class UserRegisterView(AsyncAPIView):
     serializer_class = UserRegistrationSerializer
 
+    async def post(self, request, *args, **kwargs):
+        serializer = self.serializer_class(data=request.data)
+        await sync_to_async(serializer.is_valid)(raise_exception=True)
 
-class UserLoginView(APIView):
-    serializer_class = UserLoginSerializer
+        # Same as UserRegistrationSerializer.create, with the password hashed off-thread
+        user = User(
+            username=serializer.validated_data["username"],
+            email=serializer.validated_data.get("email", ""),
+            password=await amake_password(serializer.validated_data["password"]),
+        )
+        await user.asave()
+        serializer.instance = user
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+
+class BulkUserRegisterView(APIView):
+    """
+    Registers users from a JSON Lines (application/x-ndjson) or CSV (text/csv)
+    request body, read as a stream. Returns the number of users created and
+    the errors of the rows that were skipped.
+    """
+
+    permission_classes = [IsAdminUser]
+    chunk_size = 1000
 
     def post(self, request, *args, **kwargs):
-        serializer = self.serializer_class(data=request.data)
+        # The header may carry parameters, e.g. "text/csv; charset=utf-8"
+        media_type = request.content_type.split(";")[0].strip().lower()
+        format = bulk.FORMATS.get(media_type)
+        if format is None:
+            raise UnsupportedMediaType(request.content_type)
+
+        stream = request.stream
+        lines = (
+            bulk.decode_lines(iter(stream.readline, b"")) if stream is not None else []
+        )
+        report = bulk.register_users(bulk.read_rows(lines, format), self.chunk_size)
+        return Response(report, status=status.HTTP_200_OK)
+
+
+class ExportView(APIView):
+    """
+    Streams a whole table (see users.export) as JSON Lines or CSV, picked
+    with `?format=jsonl|csv` or the Accept header. The other query parameters
+    are filters for incremental exports, e.g. `?created_after=<ISO 8601>`.
+    """
+
+    permission_classes = [IsAdminUser]
+    renderer_classes = [NDJSONRenderer, CSVRenderer]
+    chunk_size = 2000
+
+    def get(self, request, resource, *args, **kwargs):
+        export = EXPORTS.get(resource)
+        if export is None:
+            raise NotFound(f"Unknown export {resource!r}.")
+
+        filters = request.query_params.dict()
+        filters.pop(api_settings.URL_FORMAT_OVERRIDE, None)
+        try:
+            queryset = export.get_queryset(filters)
+        except ValueError as exc:
+            raise ValidationError({"filters": [str(exc)]})
+        # Rows are read after the view returns, pick the database while
+        # the request's routing still applies
+        queryset = queryset.using(queryset.db)
+
+        format = request.accepted_renderer.format
+        content = stream_rows(export, queryset, format, self.chunk_size)
+        if isinstance(request._request, ASGIRequest):
+            content = aiterate(content)
+        content_type = f"{request.accepted_renderer.media_type}; charset=utf-8"
+        response = StreamingHttpResponse(content, content_type=content_type)
+        response["Content-Disposition"] = f'attachment; filename="{resource}.{format}"'
+        return response
+
+
+class UserLoginView(AsyncAPIView):
+    serializer_class = UserLoginSerializer
+
+    async def post(self, request, *args, **kwargs):
+        # Same checks as UserLoginSerializer.validate, with the password verified off-thread
+        serializer = LoginCredentialsSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        user = serializer.validated_data
+        username = serializer.validated_data["username"]
+        password = serializer.validated_data["password"]
+
+        user = await User.objects.filter(username=username).afirst()
+        if user is None or not await acheck_password(user, password):
+            raise serializers.ValidationError(
+                {"non_field_errors": ["Invalid Credentials"]}
+            )
 
         if not user.is_active:
             return Response(
@@ -50,13 +201,47 @@ class UserLoginView(APIView):
         )
 
 
-class ArcticleViewSet(viewsets.ModelViewSet):
+class ArcticleViewSet(FastListMixin, viewsets.ModelViewSet):
     queryset = Arcticle.objects.all()
     serializer_class = ArcticleSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = LimitOffsetOrCursorPagination
+    filter_backends = [DjangoFilterBackend]
+    filterset_class = ArcticleFilter
+
+    def get_serializer_class(self):
+        # List responses skip the content column unless it's asked for with ?fields=
+        if self.action == "list":
+            return ArcticleListSerializer
+        return ArcticleSerializer
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action not in ("list", "retrieve"):
+            return queryset
+        fields = self.get_serializer_class().requested_fields(self.request)
+        if fields is None:
+            return queryset
+        columns = {"id"} | (fields & {"title", "content"})
+        queryset = queryset.only(*columns)
+        if "excerpt" in fields:
+            queryset = queryset.annotate(excerpt=Substr("content", 1, EXCERPT_LENGTH))
+        return queryset
 
+    # Answer If-None-Match / If-Modified-Since with a 304 from the article's
+    # version, or the list's cache generation, before rows are loaded
+    @conditional_arcticle
+    @cached_response("arcticles")
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
 
-class ReferralCodeViewSet(viewsets.ModelViewSet):
+    @conditional_arcticle
+    @cached_response("arcticles")
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
+
+class ReferralCodeViewSet(FastListMixin, viewsets.ModelViewSet):
     queryset = ReferralCode.objects.all()
     serializer_class = ReferralCodeSerializer
     permission_classes = [IsAuthenticated]
@@ -66,20 +251,36 @@ class ReferralCodeViewSet(viewsets.ModelViewSet):
         user = self.request.user
         return ReferralCode.objects.filter(user=user)
 
-    def generate_unique_code(self):
-        while True:
-            code = str(uuid.uuid4()).replace("-", "")[:20]
-            if not ReferralCode.objects.filter(code=code).exists():
-                return code
-
     def perform_create(self, serializer):
         user = self.request.user
-        # Generate unique code
-        code = self.generate_unique_code()
         # Set expiration date to 30 days from now
-        expiration_date = timezone.now() + timezone.timedelta(days=30)
-        # Create the referral code instance
-        serializer.save(user=user, code=code, expiration_date=expiration_date)
+        expiration_date = timezone.now() + REFERRAL_CODE_LIFETIME
+        # Create the referral code instance; its code is derived from its id,
+        # so a code that is deleted is never handed out again
+        save_referral_code(
+            lambda code: serializer.save(
+                user=user, code=code, expiration_date=expiration_date
+            )
+        )
+
+    @action(
+        detail=False,
+        methods=["post"],
+        url_path="bulk",
+        permission_classes=[IsAdminUser],
+        serializer_class=ReferralCodeBatchSerializer,
+    )
+    def bulk(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        users = User.objects.all()
+        if not serializer.validated_data["all_users"]:
+            users = users.filter(id__in=serializer.validated_data["user_ids"])
+        expiration_date = timezone.now() + timezone.timedelta(
+            days=serializer.validated_data["days"]
+        )
+        issued = issue_referral_codes(users, expiration_date)
+        return Response({"issued": issued}, status=status.HTTP_201_CREATED)
 
     def destroy(self, request, *args, **kwargs):
         instance = self.get_object()
@@ -103,11 +304,12 @@ class GetReferralCodeByEmailView(generics.RetrieveAPIView):
     serializer_class = ReferralCodeSerializer
 
     def get(self, request, *args, **kwargs):
-        email = request.data.get("email")
-        user = User.objects.filter(email=email).first()
-        print(user)
-        if user:
-            referral_code = ReferralCode.objects.filter(user=user).first()
+        # GET bodies are dropped by most clients, prefer the query string
+        email = request.query_params.get("email") or request.data.get("email")
+        if email:
+            referral_code = filter_by_email(
+                ReferralCode.objects.active(), email, "user__email"
+            ).first()
             if referral_code:
                 serializer = self.get_serializer(referral_code)
                 return Response(serializer.data)
@@ -117,8 +319,8 @@ class GetReferralCodeByEmailView(generics.RetrieveAPIView):
         )
 
 
-class RegisterWithReferralCodeView(APIView):
-    def post(self, request, *args, **kwargs):
+class RegisterWithReferralCodeView(AsyncAPIView):
+    async def post(self, request, *args, **kwargs):
         referral_code = request.data.get("referral_code")
         username = request.data.get("username")
         password = request.data.get("password")
@@ -129,40 +331,149 @@ class RegisterWithReferralCodeView(APIView):
                 {"error": "All fields are required."},
                 status=status.HTTP_400_BAD_REQUEST,
             )
-        try:
-            referral = ReferralCode.objects.get(code=referral_code)
-        except ReferralCode.DoesNotExist:
+        if not isinstance(referral_code, str) or len(referral_code) > (
+            ReferralCode._meta.get_field("code").max_length
+        ):
+            # No row can have it, don't look it up
+            return Response(
+                {"error": "Invalid referral code."}, status=status.HTTP_400_BAD_REQUEST
+            )
+        referral = await aget_referral_code(referral_code)
+        if referral is None:
+            # Only the failed lookup pays for telling expired and unknown apart
+            if (
+                await ReferralCode.objects.expired()
+                .filter(code=referral_code)
+                .aexists()
+            ):
+                return Response(
+                    {"error": "Referral code is expired."},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
             return Response(
                 {"error": "Invalid referral code."}, status=status.HTTP_400_BAD_REQUEST
             )
 
-        if not referral.is_active():
+        referrer_id, expiration_date = referral
+        # Cache timeouts stop at the expiration, but on the cache's clock,
+        # which can be ahead of or behind this worker's
+        if expiration_date <= timezone.now():
             return Response(
                 {"error": "Referral code is expired."},
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        user = User.objects.create_user(
-            username=username, password=password, email=email
+        user = User(
+            username=User.normalize_username(username),
+            email=User.objects.normalize_email(email),
         )
-        Referral.objects.create(referrer=referral.user, referee=user)
+        # Reject conflicts before paying for the password hash
+        conflict = await self.get_conflict(user)
+        if conflict is not None:
+            return Response({"error": conflict}, status=status.HTTP_409_CONFLICT)
+
+        user.password = await amake_password(password)
+        try:
+            await sync_to_async(self.create_referee)(user, referrer_id)
+        except IntegrityError:
+            # Lost a race with a concurrent signup
+            return Response(
+                {"error": "A user with that username already exists."},
+                status=status.HTTP_409_CONFLICT,
+            )
 
         return Response(
             {"success": "User registered successfully."}, status=status.HTTP_201_CREATED
         )
 
+    async def get_conflict(self, user):
+        if await User.objects.filter(username=user.username).aexists():
+            return "A user with that username already exists."
+        if (
+            user.email
+            and await filter_by_email(User.objects.all(), user.email).aexists()
+        ):
+            return "A user with that email already exists."
+        return None
 
-class ReferralListView(APIView):
-    def get(self, request, referrer_id, *args, **kwargs):
-        try:
-            referrer = User.objects.get(id=referrer_id)
-        except User.DoesNotExist:
+    @transaction.atomic
+    def create_referee(self, user, referrer_id):
+        user.save()
+        Referral.objects.create(referrer_id=referrer_id, referee=user)
+
+
+class ReferralListView(FastListMixin, generics.ListAPIView):
+    serializer_class = ReferralSerializer
+
+    def get_queryset(self):
+        # Load both users in the same query so nested serializers don't hit the DB per row
+        return (
+            Referral.objects.filter(referrer_id=self.kwargs["referrer_id"])
+            .select_related("referrer", "referee")
+            .order_by("created_at", "id")
+        )
+
+    def list(self, request, *args, **kwargs):
+        if not User.objects.filter(id=self.kwargs["referrer_id"]).exists():
             return Response(
                 {"error": "Referrer not found."}, status=status.HTTP_404_NOT_FOUND
             )
+        return super().list(request, *args, **kwargs)
+
+
+class ReferralLeaderboardView(FastListMixin, generics.ListAPIView):
+    """Users ranked by the number of people they referred, most first."""
 
-        referrals = Referral.objects.filter(referrer=referrer)
-        serializer = ReferralSerializer(
-            referrals, many=True, context={"request": request}
+    serializer_class = ReferralLeaderboardSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        # Read in users_refcounter_rank_idx order, no GROUP BY over Referral
+        return (
+            ReferralCounter.objects.filter(count__gt=0)
+            .select_related("user")
+            .order_by("-count", "user")
+        )
+
+
+class ReferralNetworkMixin:
+    """Reads the referrer and `?depth=` (default REFERRAL_MAX_DEPTH) of a network view."""
+
+    permission_classes = [IsAuthenticated]
+
+    def get_depth(self):
+        serializer = ReferralDepthSerializer(data=self.request.query_params)
+        serializer.is_valid(raise_exception=True)
+        return serializer.validated_data.get("depth", settings.REFERRAL_MAX_DEPTH)
+
+    def get_referrer_id(self):
+        referrer_id = self.kwargs["referrer_id"]
+        if not User.objects.filter(id=referrer_id).exists():
+            raise NotFound("Referrer not found.")
+        return referrer_id
+
+
+class ReferralDownlineView(ReferralNetworkMixin, generics.ListAPIView):
+    """Users referred by the referrer, directly or through others, level by level."""
+
+    serializer_class = ReferralDownlineSerializer
+
+    def get_queryset(self):
+        # One recursive query per page, plus one for the count
+        return Downline(self.get_referrer_id(), self.get_depth())
+
+
+class ReferralNetworkView(ReferralNetworkMixin, APIView):
+    """Size of the referrer's network, in total and per level."""
+
+    def get(self, request, referrer_id):
+        depth = self.get_depth()
+        levels = network_levels(self.get_referrer_id(), depth)
+        return Response(
+            {
+                "user": referrer_id,
+                "depth": depth,
+                "size": sum(levels),
+                "levels": levels,
+            }
         )
-        return Response(serializer.data, status=status.HTTP_200_OK)